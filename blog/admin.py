@@ -1,43 +1,107 @@
 from django.contrib import admin
-from .models import Post, Like, Comment, Tag
+from django.contrib.admin.views.main import PAGE_VAR
+from django.core.paginator import Paginator
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
+from .models import Post, Like, Comment, Tag, AuthorSubscription, TagSubscription
 # Register your models here.
 
 admin.site.empty_value_display = 'Не задано'
 
-class PostAdmin(admin.ModelAdmin):
-    list_display = ('author', 'title','category','created_at', 'updated_at', 'likes_count')
-    search_fields = ['title', 'content','category','tags', 'author__username']
+class CappedCountPaginator(Paginator):
+    """
+    Считает строки не дальше COUNT_LIMIT после текущей страницы: COUNT(*) по всей
+    большой таблице стоит секунды. Если строк больше, capped=True (в шаблоне
+    число показывается как «N+»), а с последней из видимых страниц счёт идёт дальше.
+    """
+    COUNT_LIMIT = 10000
+
+    def __init__(self, *args, page_number=1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.page_number = page_number
+        self.capped = False
+
+    @cached_property
+    def count(self):
+        limit = (self.page_number - 1) * self.per_page + self.COUNT_LIMIT
+        found = self.object_list.order_by().values('pk')[:limit + 1].count()
+        self.capped = found > limit
+        return min(found, limit)
+
+
+class FastChangeListMixin:
+    # Без полного COUNT(*) рядом с отфильтрованным и с ограниченным подсчётом для страниц
+    show_full_result_count = False
+    paginator = CappedCountPaginator
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        try:
+            page_number = max(int(request.GET.get(PAGE_VAR, 1)), 1)
+        except ValueError:
+            page_number = 1
+        return self.paginator(queryset, per_page, orphans, allow_empty_first_page, page_number=page_number)
+
+
+class PostAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('author', 'title','category','created_at', 'updated_at', 'likes_count', 'comments_count')
+    list_select_related = ['author']
+    # Поиск по началу строки вместо icontains по тексту и тегам (M2M давал дубли строк);
+    # istartswith в SQLite - это LIKE, он идёт по индексу title с COLLATE NOCASE
+    search_fields = ['^title', '=author__username']
     list_filter = ['created_at','category','tags']
     list_display_links = ['title']
-    readonly_fields = ['created_at', 'updated_at']
-    filter_horizontal = ['tags']
-
-    def likes_count(self, obj):
-        return obj.like_set.count()
-    likes_count.short_description = 'Likes'
+    readonly_fields = ['created_at', 'updated_at', 'likes_count', 'comments_count']
+    autocomplete_fields = ['author', 'tags']
 admin.site.register(Post, PostAdmin)
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ('author', 'post', 'content', 'created_at', 'short_content', 'reply_count')
+    list_select_related = ['author', 'post']
     list_filter = ['created_at', 'post__category', 'post__tags']
-    search_fields = ['content', 'post__title', 'post__content', 'post__category', 'post__tags', 'author__username']
+    search_fields = ['^post__title', '=author__username']
+    autocomplete_fields = ['author', 'post', 'parent']
+
+    def get_queryset(self, request):
+        # Число прямых ответов считается в том же запросе, что и страница
+        replies = (
+            Comment.objects.filter(parent=OuterRef('pk'))
+            .order_by()
+            .values('parent')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return super().get_queryset(request).annotate(reply_count=Coalesce(Subquery(replies), 0))
 
     def short_content(self, obj):
         return obj.content[:20]
     short_content.short_description = 'Текст комментария'
 
     def reply_count(self, obj):
-        return obj.get_children().count()
+        return obj.reply_count
     reply_count.short_description = 'Количество ответов'
+    reply_count.admin_order_field = 'reply_count'
 admin.site.register(Comment, CommentAdmin)
 
-class LikeAdmin(admin.ModelAdmin):
+class LikeAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ('user', 'post')
-    search_fields = ['post__title', 'user__username']
+    list_select_related = ['user', 'post']
+    search_fields = ['^post__title', '=user__username']
+    autocomplete_fields = ['user', 'post']
 admin.site.register(Like, LikeAdmin)
 
 class TagAdmin(admin.ModelAdmin):
     list_display = ('name',)
     search_fields = ['name',]
 admin.site.register(Tag, TagAdmin)
+
+class AuthorSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ('subscriber', 'author', 'created_at')
+    search_fields = ['subscriber__username', 'author__username']
+admin.site.register(AuthorSubscription, AuthorSubscriptionAdmin)
+
+class TagSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ('subscriber', 'tag', 'created_at')
+    search_fields = ['subscriber__username', 'tag__name']
+admin.site.register(TagSubscription, TagSubscriptionAdmin)
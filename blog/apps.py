@@ -1,7 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Blog'
+
+    def ready(self):
+        from . import checks, signals, throttling  # noqa: F401 (checks и throttling регистрируют проверки и счётчики)
+        # Запись SQL в метрики запроса ставится на каждое соединение при его открытии
+        from blog_project import instrumentation  # noqa: F401
+        post_migrate.connect(signals.create_search_table, sender=self)
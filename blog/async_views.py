@@ -0,0 +1,164 @@
+"""
+Асинхронные версии горячих маршрутов чтения: список и детали постов, комментарии поста.
+Под ASGI они не держат поток, пока ждут базу и кэш: ORM вызывается через aget/aiterator,
+пользователь из JWT - через CachedJWTAuthentication.aauthenticate.
+
+Ответы совпадают с синхронными PostViewSet/CommentViewSet, но параметров меньше:
+только keyset-пагинация (?cursor=), ?category= и ?fields=. Поиск, сортировка и
+фасеты остаются на синхронных маршрутах. Маршруты только для чтения и открыты всем,
+как и GET в AuthorOrReadOnly, поэтому проверка прав сводится к require_safe.
+
+ETag, Last-Modified и 304 - те же, что в ConditionalResponseMixin: валидаторы
+считаются до построения ответа, и 304 отдаётся без пагинации и сериализации.
+"""
+from functools import wraps
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, ValidationError
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from .conditional import add_validators, aget_validators, anot_modified_response
+from .models import Post, Comment
+from .pagination import KeysetPagination
+from .response_cache import (
+    POSTS_SCOPE,
+    POST_LIST_SCOPE,
+    post_detail_scope,
+    comment_list_scope,
+    acached_data,
+    aget_versions,
+)
+from .serializers import PostSerializer, CommentSerializer
+from .views import (
+    CommentViewSet,
+    attach_threads,
+    comment_list_aggregates,
+    comment_list_validators,
+    post_validators_query,
+    requested_post_fields,
+    sparse_post_queryset,
+    thread_descendants,
+    with_viewer_likes,
+)
+from users.authentication import CachedJWTAuthentication
+
+authenticator = CachedJWTAuthentication()
+
+POST_LIST_PARAMS = {'cursor', 'category', 'fields'}
+POST_DETAIL_PARAMS = {'fields'}
+COMMENT_LIST_PARAMS = {'cursor'}
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    return JsonResponse(data, status=status_code, safe=False, encoder=JSONEncoder,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def error_response(request, exc):
+    # Формат как у обработчика исключений DRF
+    data = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+    response = json_response(data, exc.status_code)
+    if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+        response['WWW-Authenticate'] = authenticator.authenticate_header(request)
+    return response
+
+
+async def conditional_json(request, scopes, validators, build):
+    """Как ConditionalResponseMixin.conditional_response; validators и build - корутины."""
+    found = await aget_validators(request, scopes, validators)
+    if found is not None:
+        not_modified = await anot_modified_response(request, *found)
+        if not_modified is not None:
+            return not_modified
+    response = json_response(await acached_data(request, scopes, build))
+    return add_validators(response, *found) if found is not None else response
+
+
+def async_api_view(allowed_params):
+    """Аутентификация по JWT, проверка параметров и ответы об ошибках в формате DRF."""
+    def decorator(view):
+        @require_safe
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                found = await authenticator.aauthenticate(request)
+                api_request = Request(request)
+                api_request.user = found[0] if found else AnonymousUser()
+                unknown = sorted(set(api_request.query_params) - allowed_params)
+                if unknown:
+                    raise ValidationError({name: 'Not supported by the async endpoint.' for name in unknown})
+                return await view(api_request, *args, **kwargs)
+            except APIException as exc:
+                return error_response(request, exc)
+        return wrapper
+    return decorator
+
+
+def post_queryset(request, fields):
+    queryset = Post.objects.select_related('author').prefetch_related('tags')
+    return sparse_post_queryset(with_viewer_likes(queryset, request.user), fields)
+
+
+@async_api_view(POST_LIST_PARAMS)
+async def post_list(request):
+    fields = requested_post_fields(request, list_mode=True)
+    queryset = post_queryset(request, fields).order_by('-created_at')
+    category = request.query_params.get('category')
+    if category:
+        if category not in dict(Post.CATEGORY_CHOICES):
+            raise ValidationError({'category': [f'Select a valid choice. {category} is not one of the available choices.']})
+        queryset = queryset.filter(category=category)
+
+    async def build():
+        paginator = KeysetPagination()
+        page = await paginator.apaginate_queryset(queryset, request)
+        return paginator.get_paginated_data(PostSerializer(page, many=True, fields=fields).data)
+
+    scopes = [POSTS_SCOPE, POST_LIST_SCOPE]
+
+    async def validators():
+        return None, await aget_versions(scopes)
+
+    return await conditional_json(request, scopes, validators, build)
+
+
+@async_api_view(POST_DETAIL_PARAMS)
+async def post_detail(request, pk):
+    fields = requested_post_fields(request, list_mode=False)
+
+    async def build():
+        try:
+            post = await post_queryset(request, fields).aget(pk=pk)
+        except Post.DoesNotExist:
+            raise NotFound('No Post matches the given query.')
+        return PostSerializer(post, fields=fields).data
+
+    async def validators():
+        row = await post_validators_query(pk, request.user).afirst()
+        return None if row is None else (None, row)
+
+    return await conditional_json(request, [POSTS_SCOPE, post_detail_scope(pk)], validators, build)
+
+
+@async_api_view(COMMENT_LIST_PARAMS)
+async def comment_list(request, post_pk):
+    queryset = Comment.objects.filter(post_id=post_pk).select_related('author')
+
+    async def build():
+        paginator = KeysetPagination()
+        roots = await paginator.apaginate_queryset(queryset.filter(level=0), request)
+        descendants = []
+        if roots:
+            descendants = [node async for node in thread_descendants(queryset, roots, CommentViewSet.replies_preview)]
+        threads = attach_threads(roots, descendants)
+        return paginator.get_paginated_data(CommentSerializer(threads, many=True).data)
+
+    async def validators():
+        found = await Comment.objects.filter(post_id=post_pk).aaggregate(**comment_list_aggregates())
+        return comment_list_validators(found, (await aget_versions([comment_list_scope(post_pk)]))[0])
+
+    return await conditional_json(request, [POSTS_SCOPE, comment_list_scope(post_pk)], validators, build)
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.checks import Error, register
+from django.db import DatabaseError, connections
+
+from .models import Post
+from .timeline import local_store_allowed
+from blog_project import db_router
+
+
+@register()
+def check_timeline_store(app_configs, **kwargs):
+    # Проверка при старте: иначе ленты молча оставались бы пустыми
+    if settings.TIMELINE_REDIS_URL or local_store_allowed():
+        return []
+    return [Error(
+        'TIMELINE_REDIS_URL is not set, but Celery tasks run in a worker process.',
+        hint='Set REDIS_HOST so the worker and the web process share the timelines, '
+             'or set CELERY_TASK_ALWAYS_EAGER for a single-process setup.',
+        id='blog.E001',
+    )]
+
+
+@register()
+def check_replica_schema(app_configs, **kwargs):
+    # migrate не трогает реплику (allow_migrate), поэтому пустой файл реплики ломал бы каждое чтение
+    if not db_router.replica_configured():
+        return []
+    try:
+        tables = connections[db_router.REPLICA].introspection.table_names()
+    except DatabaseError as error:
+        tables, reason = [], str(error)
+    else:
+        reason = 'it has no blog tables'
+    if Post._meta.db_table in tables:
+        return []
+    return [Error(
+        f'The read replica is not a copy of the primary database: {reason}.',
+        hint='DB_REPLICA_NAME must point to a replicated copy of the primary (for example, restored '
+             'from sqlite3 .backup and kept up to date by replication); migrate does not create it. '
+             'On a fresh install migrate the primary without DB_REPLICA_NAME, then copy it.',
+        id='blog.E002',
+    )]
@@ -0,0 +1,107 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import status
+
+from . import stats
+from .response_cache import CachedResponseMixin, aget_versions, response_key
+
+stats.register('conditional.not_modified')
+
+
+def make_etag(request, parts):
+    # Ответ зависит от параметров запроса и от пользователя (is_liked)
+    params = urlencode(sorted(request.query_params.lists()), doseq=True)
+    raw = repr((parts, params, request.user.pk))
+    return '"%s"' % hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def pack_validators(request, result):
+    # result - (last_modified, parts) от функции validators или None, если объекта нет
+    if result is None:
+        return None
+    last_modified, parts = result
+    timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+    return make_etag(request, parts), timestamp
+
+
+def validators_key(scopes, request, versions=None):
+    return f'validators:{response_key(scopes, request, versions)}'
+
+
+async def aget_validators(request, scopes, validators):
+    """Как ConditionalResponseMixin.get_validators для асинхронных представлений; validators - корутина."""
+    if request.user.is_authenticated:
+        return pack_validators(request, await validators())
+    key = validators_key(scopes, request, await aget_versions(scopes))
+    cached = await cache.aget(key)
+    if cached is None:
+        cached = pack_validators(request, await validators())
+        if cached is not None:
+            await cache.aset(key, cached, settings.RESPONSE_CACHE_TIMEOUT)
+    return cached
+
+
+def not_modified_response(request, etag, last_modified):
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        stats.incr('conditional.not_modified')
+        patch_vary_headers(not_modified, ['Authorization'])
+    return not_modified
+
+
+async def anot_modified_response(request, etag, last_modified):
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        await stats.aincr('conditional.not_modified')
+        patch_vary_headers(not_modified, ['Authorization'])
+    return not_modified
+
+
+def add_validators(response, etag, last_modified):
+    if response.status_code == status.HTTP_200_OK:
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+class ConditionalResponseMixin(CachedResponseMixin):
+    """
+    ETag и Last-Modified для GET. Валидаторы считаются до построения ответа одним
+    дешёвым запросом (или вовсе по версиям scope'ов в кэше): функция validators
+    возвращает (last_modified, parts) или None, и 304 отдаётся до пагинации и сериализации.
+    Для анонимных запросов валидаторы кэшируются под теми же версиями scope'ов,
+    что и ответы, поэтому попадание в кэш не стоит запросов.
+
+    Last-Modified отдаётся, только если его можно честно посчитать: счётчики постов
+    меняются через F() без updated_at, поэтому у постов валидатор - только ETag.
+    """
+
+    def get_validators(self, request, scopes, validators):
+        if request.user.is_authenticated:
+            return pack_validators(request, validators(request))
+        key = validators_key(scopes, request)
+        cached = cache.get(key)
+        if cached is None:
+            cached = pack_validators(request, validators(request))
+            if cached is not None:
+                cache.set(key, cached, settings.RESPONSE_CACHE_TIMEOUT)
+        return cached
+
+    def conditional_response(self, request, scopes, validators, build, *args, **kwargs):
+        found = self.get_validators(request, scopes, validators)
+        if found is None:
+            # Объекта нет - пусть build вернёт 404 как обычно
+            return self.cached_response(request, scopes, build, *args, **kwargs)
+
+        not_modified = not_modified_response(request, *found)
+        if not_modified is not None:
+            return not_modified
+        response = self.cached_response(request, scopes, build, *args, **kwargs)
+        return add_validators(response, *found)
@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Post
+
+# Общие фасеты лежат в кэше по ключу на каждую категорию и каждый тег, чтобы
+# запись меняла их атомарным incr. FACETS_KEY - индекс тегов {id: имя}.
+FACETS_KEY = 'facets:posts'
+# Параметры, которые не сужают выборку: для них подходят кэшированные общие фасеты
+NON_FILTER_PARAMS = {'page', 'page_size', 'cursor', 'ordering', 'facets', 'fields', 'format'}
+
+
+def is_unfiltered(query_params):
+    return all(param in NON_FILTER_PARAMS for param in query_params)
+
+
+def render(categories, tags):
+    top_tags = sorted(((name, count) for name, count in tags.items() if count > 0),
+                      key=lambda item: (-item[1], item[0]))[:settings.FACETS_TAGS_LIMIT]
+    return {
+        'category': {choice: categories.get(choice, 0) for choice, _ in Post.CATEGORY_CHOICES},
+        'tags': [{'name': name, 'count': count} for name, count in top_tags],
+    }
+
+
+def count_categories(queryset):
+    return dict(queryset.order_by().values_list('category').annotate(total=Count('pk')))
+
+
+def count_tags(queryset, limit=None):
+    rows = (
+        Post.tags.through.objects.filter(post_id__in=queryset.order_by().values('pk'))
+        .values_list('tag__name')
+        .annotate(total=Count('pk'))
+        .order_by('-total', 'tag__name')
+    )
+    if limit is not None:
+        rows = rows[:limit]
+    return dict(rows)
+
+
+def count_tag_ids(queryset):
+    rows = (
+        Post.tags.through.objects.filter(post_id__in=queryset.order_by().values('pk'))
+        .values_list('tag_id', 'tag__name')
+        .annotate(total=Count('pk'))
+    )
+    return {tag_id: (name, total) for tag_id, name, total in rows}
+
+
+def category_key(name):
+    return f'facets:category:{name}'
+
+
+def tag_key(tag_id):
+    return f'facets:tag:{tag_id}'
+
+
+def compute_facets(queryset):
+    # Один сгруппированный запрос на категории и один на теги
+    return render(count_categories(queryset), count_tags(queryset, settings.FACETS_TAGS_LIMIT))
+
+
+def get_unfiltered_facets():
+    choices = [choice for choice, _ in Post.CATEGORY_CHOICES]
+    index = cache.get(FACETS_KEY)
+    if index is not None:
+        keys = [category_key(choice) for choice in choices] + [tag_key(tag_id) for tag_id in index]
+        counts = cache.get_many(keys)
+        # Вытесненный счётчик - как и отсутствие индекса: всё пересчитываем
+        if len(counts) == len(keys):
+            return render({choice: counts[category_key(choice)] for choice in choices},
+                          {name: counts[tag_key(tag_id)] for tag_id, name in index.items()})
+
+    posts = Post.objects.all()
+    categories = count_categories(posts)
+    tags = count_tag_ids(posts)
+    cache.set_many({
+        **{category_key(choice): categories.get(choice, 0) for choice in choices},
+        **{tag_key(tag_id): total for tag_id, (_, total) in tags.items()},
+    }, settings.FACETS_CACHE_TIMEOUT)
+    cache.set(FACETS_KEY, {tag_id: name for tag_id, (name, _) in tags.items()}, settings.FACETS_CACHE_TIMEOUT)
+    return render(categories, dict(tags.values()))
+
+
+def adjust(categories=None, tags=None):
+    """
+    Меняет закэшированные общие счётчики: {категория или id тега: дельта}.
+    Каждый счётчик - отдельный ключ и атомарный incr, поэтому параллельные записи
+    не теряют друг друга. Тег, которого нет в индексе, и вытесненный ключ сбрасывают всё.
+    """
+    index = cache.get(FACETS_KEY)
+    if index is None:
+        return
+    tags = tags or {}
+    if any(tag_id not in index for tag_id in tags):
+        invalidate()
+        return
+    deltas = [(category_key(name), delta) for name, delta in (categories or {}).items()]
+    deltas += [(tag_key(tag_id), delta) for tag_id, delta in tags.items()]
+    for key, delta in deltas:
+        if not delta:
+            continue
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            invalidate()
+            return
+
+
+def adjust_on_commit(categories=None, tags=None, using=None):
+    # Откаченная запись не должна сдвигать счётчики
+    transaction.on_commit(lambda: adjust(categories, tags), using=using)
+
+
+def invalidate():
+    cache.delete(FACETS_KEY)
+
+
+def invalidate_on_commit(using=None):
+    transaction.on_commit(invalidate, using=using)
@@ -0,0 +1,277 @@
+"""
+Массовая загрузка постов, тегов, комментариев и лайков из JSONL в формате blog.export.
+Записи вставляются пачками через bulk_create, каждая пачка - отдельная транзакция,
+после которой номер строки пишется в файл контрольной точки для продолжения.
+"""
+import json
+import os
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from . import facets, search
+from .models import Post, Comment, Like, make_excerpt
+from .tags import normalize_tag_names, resolve_tag_ids
+
+User = get_user_model()
+
+CHUNK_SIZE = 1000
+# У ещё не пронумерованных комментариев lft = 0, см. rebuild_trees
+PLACEHOLDER = 0
+REBUILD_TREES_BATCH = 500
+
+
+def read_checkpoint(path):
+    try:
+        with open(path, encoding='utf-8') as checkpoint:
+            return json.load(checkpoint)['line']
+    except FileNotFoundError:
+        return 0
+
+
+def write_checkpoint(path, line):
+    # Через временный файл, чтобы обрыв не оставил битую контрольную точку
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as checkpoint:
+        json.dump({'line': line}, checkpoint)
+    os.replace(tmp_path, path)
+
+
+def number_tree(nodes):
+    """
+    Считает lft/rght/level для узлов одного дерева, отсортированных по (created_at, id).
+    Как в seed_comments: дерево нумеруется целиком в памяти, без сдвигов в базе.
+    """
+    children = {}
+    roots = []
+    for node in nodes:
+        if node.parent_id is None:
+            roots.append(node)
+        else:
+            children.setdefault(node.parent_id, []).append(node)
+
+    counter = 0
+    for root in roots:
+        root.level = 0
+        # Обход без рекурсии: у импортируемых деревьев глубина не ограничена
+        counter += 1
+        root.lft = counter
+        stack = [(root, iter(children.get(root.pk, [])))]
+        while stack:
+            node, pending = stack[-1]
+            child = next(pending, None)
+            if child is None:
+                counter += 1
+                node.rght = counter
+                stack.pop()
+                continue
+            child.level = node.level + 1
+            counter += 1
+            child.lft = counter
+            stack.append((child, iter(children.get(child.pk, []))))
+    return nodes
+
+
+class BlogImporter:
+
+    def __init__(self, stdout, chunk_size=CHUNK_SIZE):
+        self.stdout = stdout
+        self.chunk_size = chunk_size
+        self.counts = {'post': 0, 'comment': 0, 'like': 0, 'skipped': 0, 'existing': 0}
+        self.next_tree_id = None
+
+    def run(self, path, checkpoint_path, resume=False):
+        start_line = read_checkpoint(checkpoint_path) if resume else 0
+        started = time.perf_counter()
+        self.next_tree_id = (Comment.objects.aggregate(Max('tree_id'))['tree_id__max'] or 0) + 1
+
+        chunk = []
+        line_number = 0
+        with open(path, encoding='utf-8') as source:
+            for line_number, line in enumerate(source, start=1):
+                if line_number <= start_line or not line.strip():
+                    continue
+                chunk.append(json.loads(line))
+                if len(chunk) >= self.chunk_size:
+                    self.flush(chunk, checkpoint_path, line_number, started)
+                    chunk = []
+        if chunk:
+            self.flush(chunk, checkpoint_path, line_number, started)
+
+        trees = self.rebuild_trees()
+        self.finish()
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        return {**self.counts, 'trees': trees, 'seconds': time.perf_counter() - started}
+
+    def flush(self, records, checkpoint_path, line_number, started):
+        by_type = {'post': [], 'comment': [], 'like': []}
+        for record in records:
+            if record.get('type') in by_type:
+                by_type[record['type']].append(record)
+        with transaction.atomic():
+            self.import_posts(by_type['post'])
+            self.import_comments(by_type['comment'])
+            self.import_likes(by_type['like'])
+        write_checkpoint(checkpoint_path, line_number)
+
+        imported = self.counts['post'] + self.counts['comment'] + self.counts['like']
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'line {line_number}: {imported} records, {imported / max(elapsed, 1e-9):.0f} records/s')
+
+    def existing_users(self, ids):
+        return set(User.objects.filter(pk__in=ids).values_list('pk', flat=True))
+
+    def existing_posts(self, ids):
+        return set(Post.objects.filter(pk__in=ids).values_list('pk', flat=True))
+
+    def skip_existing(self, model, records):
+        """
+        Отбрасывает записи, чьи id уже есть в базе: их даты, теги и счётчики не трогаем.
+        Так же отсеивается и повтор уже закоммиченной пачки при продолжении с контрольной точки.
+        """
+        ids = {record['id'] for record in records}
+        existing = set(model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        kept = [record for record in records if record['id'] not in existing]
+        self.counts['existing'] += len(records) - len(kept)
+        return kept
+
+    def import_posts(self, records):
+        records = self.skip_existing(Post, records)
+        if not records:
+            return
+        users = self.existing_users({record['author_id'] for record in records})
+        records = self.skip_missing(records, lambda record: record['author_id'] in users)
+        posts = [
+            Post(
+                pk=record['id'],
+                author_id=record['author_id'],
+                title=record['title'],
+                content=record['content'],
+                excerpt=make_excerpt(record['content']),
+                category=record.get('category') or 'OTHER',
+                likes_count=0,
+                comments_count=0,
+            )
+            for record in records
+        ]
+        # Существующие id уже отсеяны; ignore_conflicts страхует только от параллельной вставки
+        Post.objects.bulk_create(posts, batch_size=500, ignore_conflicts=True)
+        # auto_now_add/auto_now перезаписывают даты при вставке, возвращаем исходные
+        self.restore_dates(Post, posts, records, ['created_at', 'updated_at'])
+
+        names = normalize_tag_names(name for record in records for name in record.get('tags', []))
+        tag_ids = dict(zip(names, resolve_tag_ids(names)))
+        Post.tags.through.objects.bulk_create([
+            Post.tags.through(post_id=record['id'], tag_id=tag_ids[name])
+            for record in records
+            for name in normalize_tag_names(record.get('tags', []))
+        ], batch_size=500, ignore_conflicts=True)
+        self.counts['post'] += len(posts)
+
+    def import_comments(self, records):
+        records = self.skip_existing(Comment, records)
+        if not records:
+            return
+        users = self.existing_users({record['author_id'] for record in records})
+        posts = self.existing_posts({record['post_id'] for record in records})
+        # Родители из прошлых пачек уже в базе; из этой пачки - в trees
+        outside = {record.get('parent_id') for record in records} - {record['id'] for record in records} - {None}
+        trees = {pk: tree_id for pk, tree_id in Comment.objects.filter(pk__in=outside).values_list('pk', 'tree_id')}
+
+        comments = []
+        kept = []
+        for record in records:
+            parent_id = record.get('parent_id')
+            if record['author_id'] not in users or record['post_id'] not in posts or (
+                    parent_id is not None and parent_id not in trees):
+                self.counts['skipped'] += 1
+                continue
+            if parent_id is None:
+                tree_id = self.next_tree_id
+                self.next_tree_id += 1
+            else:
+                tree_id = trees[parent_id]
+            trees[record['id']] = tree_id
+            comments.append(Comment(
+                pk=record['id'],
+                post_id=record['post_id'],
+                author_id=record['author_id'],
+                parent_id=parent_id,
+                content=record['content'],
+                tree_id=tree_id,
+                lft=PLACEHOLDER,
+                rght=PLACEHOLDER,
+                level=0,
+            ))
+            kept.append(record)
+        # Поля MPTT посчитаем в конце, одним проходом по каждому затронутому дереву
+        Comment.objects.bulk_create(comments, batch_size=500, ignore_conflicts=True)
+        self.restore_dates(Comment, comments, kept, ['created_at'])
+        self.counts['comment'] += len(comments)
+
+    def import_likes(self, records):
+        records = self.skip_existing(Like, records)
+        if not records:
+            return
+        users = self.existing_users({record['user_id'] for record in records})
+        posts = self.existing_posts({record['post_id'] for record in records})
+        records = self.skip_missing(records, lambda record: record['user_id'] in users and record['post_id'] in posts)
+        likes = [Like(pk=record['id'], user_id=record['user_id'], post_id=record['post_id']) for record in records]
+        Like.objects.bulk_create(likes, batch_size=500, ignore_conflicts=True)
+        self.restore_dates(Like, likes, records, ['created_at'])
+        self.counts['like'] += len(likes)
+
+    def skip_missing(self, records, exists):
+        kept = [record for record in records if exists(record)]
+        self.counts['skipped'] += len(records) - len(kept)
+        return kept
+
+    def restore_dates(self, model, objs, records, fields):
+        changed = []
+        for obj, record in zip(objs, records):
+            values = {field: parse_datetime(record[field]) for field in fields if record.get(field)}
+            if values:
+                for field, value in values.items():
+                    setattr(obj, field, value)
+                changed.append(obj)
+        if changed:
+            model.objects.bulk_update(changed, fields, batch_size=500)
+
+    def rebuild_trees(self):
+        """Нумерует все деревья, где остались узлы-заглушки; одна пачка UPDATE на группу деревьев."""
+        tree_ids = list(Comment.objects.filter(lft=PLACEHOLDER).values_list('tree_id', flat=True).distinct())
+        for start in range(0, len(tree_ids), REBUILD_TREES_BATCH):
+            batch = tree_ids[start:start + REBUILD_TREES_BATCH]
+            nodes = list(
+                Comment.objects.filter(tree_id__in=batch)
+                .only('id', 'parent_id', 'tree_id', 'created_at')
+                .order_by('tree_id', 'created_at', 'id')
+            )
+            by_tree = {}
+            for node in nodes:
+                by_tree.setdefault(node.tree_id, []).append(node)
+            for tree in by_tree.values():
+                number_tree(tree)
+            with transaction.atomic():
+                Comment.objects.bulk_update(nodes, ['lft', 'rght', 'level'], batch_size=500)
+        return len(tree_ids)
+
+    def finish(self):
+        # id вставлены явно: последовательности (PostgreSQL) надо сдвинуть за них
+        statements = connection.ops.sequence_reset_sql(no_style(), [Post, Comment, Like])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+        # bulk_create обходит сигналы: счётчики, поиск и кэши обновляем сами
+        call_command('recount_post_counters', stdout=StringIO())
+        if search.is_supported():
+            search.rebuild_index()
+        facets.invalidate()
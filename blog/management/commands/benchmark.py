@@ -0,0 +1,215 @@
+import json
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from blog.models import Post, Comment, Like, AuthorSubscription, TagSubscription
+from blog.seed import SEED_PASSWORD, seed_dataset
+from blog.throttling import ActionRateThrottle
+from notifications.models import Notification
+
+
+User = get_user_model()
+
+# Маршруты, которые routes() не замеряет, с причиной. Новый маршрут надо добавить
+# либо в routes(), либо сюда - это проверяет test_benchmark_covers_every_route.
+UNMEASURED_ROUTES = {
+    'api-root': 'служебный список маршрутов DRF',
+    'notification-stream': 'бесконечный поток SSE, время ответа не имеет смысла',
+}
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, round(q * (len(values) - 1)))]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу реалистичными данными и замеряет p50/p95 и число SQL-запросов '
+        'для каждого маршрута blog, notifications и JWT. По умолчанию все изменения откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--tags', type=int, default=100)
+        parser.add_argument('--comments', type=int, default=5000)
+        parser.add_argument('--likes', type=int, default=10000)
+        parser.add_argument('--notifications', type=int, default=5000)
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help='Не откатывать сгенерированные данные')
+
+    def handle(self, *args, **options):
+        # Лимиты записи сработали бы после первых десятков итераций, и замерялись бы ответы 429.
+        # Проверка лимита остаётся в замере, но с недостижимыми значениями
+        rates = {scope: f'{10 ** 9}/min' for scope in ActionRateThrottle.THROTTLE_RATES}
+        try:
+            with transaction.atomic(), mock.patch.object(ActionRateThrottle, 'THROTTLE_RATES', rates):
+                self.run(options)
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write('Сгенерированные данные откачены')
+
+    def run(self, options):
+        started = time.perf_counter()
+        data = seed_dataset(
+            users=options['users'], posts=options['posts'], tags=options['tags'],
+            comments=options['comments'], likes=options['likes'],
+            notifications=options['notifications'], seed=options['seed'],
+        )
+        self.stdout.write(f'Данные сгенерированы за {time.perf_counter() - started:.1f} с')
+        self.prepare(data)
+
+        self.stdout.write(f'{"route":<34} {"method":<7} {"status":>6} {"p50 ms":>9} {"p95 ms":>9} {"queries":>8}')
+        for name, method, make_request in self.routes():
+            timings, queries, status = [], 0, None
+            for _ in range(options['iterations']):
+                path, kwargs = make_request()
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = getattr(self.client, method)(path, **kwargs)
+                    if response.streaming:
+                        # Потоковый ответ формируется при чтении - читаем его целиком
+                        b''.join(response.streaming_content)
+                    timings.append((time.perf_counter() - start) * 1000)
+                status = response.status_code
+                if status >= 400:
+                    # Замер ответов с ошибкой ничего не говорит о самом обработчике
+                    raise CommandError(f'{name}: {method.upper()} {path} returned {status}')
+                queries = max(queries, len(captured))
+            self.stdout.write(
+                f'{name:<34} {method.upper():<7} {status:>6} '
+                f'{percentile(timings, 0.5):>9.2f} {percentile(timings, 0.95):>9.2f} {queries:>8}'
+            )
+
+    def prepare(self, data):
+        # Объекты и токены, с которыми routes() строит запросы
+        self.user = data['users'][0]
+        self.post = Post.objects.filter(author=self.user).first() or data['posts'][0]
+        self.busy_post = Post.objects.order_by('-likes_count').first()
+        self.comment = Comment.objects.filter(post=self.busy_post, level=0).first()
+        self.notification = Notification.objects.filter(user=self.user).first() or Notification.objects.create(
+            user=self.user, message='benchmark')
+        self.author = data['users'][1]
+        self.tag = data['tags'][0]
+        admin = User.objects.create_user(username='benchmark-admin', email='benchmark-admin@example.com', is_staff=True)
+        self.client = Client(HTTP_HOST='localhost')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+        self.admin_auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(admin).access_token}'}
+        self.refresh = str(RefreshToken.for_user(self.user))
+
+    def json(self, body, auth=True):
+        kwargs = {'data': json.dumps(body), 'content_type': 'application/json'}
+        if auth:
+            kwargs.update(self.auth)
+        return kwargs
+
+    def new_post(self):
+        return Post.objects.create(author=self.user, title='benchmark', content='benchmark')
+
+    def new_comment(self):
+        return Comment.objects.create(post=self.busy_post, author=self.user, content='benchmark')
+
+    def unliked(self, path):
+        Like.objects.filter(user=self.user, post=self.post).delete()
+        return path
+
+    def liked(self, path):
+        Like.objects.get_or_create(user=self.user, post=self.post)
+        return path
+
+    def author_subscription(self):
+        return AuthorSubscription.objects.get_or_create(subscriber=self.user, author=self.author)[0]
+
+    def tag_subscription(self):
+        return TagSubscription.objects.get_or_create(subscriber=self.user, tag=self.tag)[0]
+
+    def unsubscribed(self, path):
+        AuthorSubscription.objects.filter(subscriber=self.user, author=self.author).delete()
+        TagSubscription.objects.filter(subscriber=self.user, tag=self.tag).delete()
+        return path
+
+    def routes(self):
+        post_list = reverse('post-list')
+        post_detail = reverse('post-detail', args=[self.busy_post.pk])
+        own_post = reverse('post-detail', args=[self.post.pk])
+        comments = reverse('post-comments-list', args=[self.busy_post.pk])
+        likes = reverse('post-likes-list', args=[self.busy_post.pk])
+        like_target = reverse('post-likes-list', args=[self.post.pk])
+        unlike_target = reverse('post-likes-delete-like', args=[self.post.pk])
+        notifications = reverse('notification-list')
+        author_subscriptions = reverse('author-subscription-list')
+        tag_subscriptions = reverse('tag-subscription-list')
+        liked_ids = ','.join(str(pk) for pk in Post.objects.values_list('pk', flat=True)[:20])
+        return [
+            ('post-list (anonymous)', 'get', lambda: (post_list, {})),
+            ('post-list', 'get', lambda: (post_list, self.auth)),
+            ('post-list ?search', 'get', lambda: (post_list + '?search=python', self.auth)),
+            ('post-list ?cursor', 'get', lambda: (post_list + '?cursor=', self.auth)),
+            ('post-create', 'post', lambda: (post_list, self.json(
+                {'title': 'benchmark', 'content': 'benchmark', 'category': 'OTHER', 'tags': ['python', 'django']}))),
+            ('post-detail (anonymous)', 'get', lambda: (post_detail, {})),
+            ('post-detail', 'get', lambda: (post_detail, self.auth)),
+            ('post-trending', 'get', lambda: (reverse('post-trending'), self.auth)),
+            ('post-liked', 'get', lambda: (reverse('post-liked') + f'?ids={liked_ids}', self.auth)),
+            ('post-update', 'patch', lambda: (own_post, self.json({'title': 'benchmark'}))),
+            ('post-delete', 'delete', lambda: (reverse('post-detail', args=[self.new_post().pk]), self.auth)),
+            ('post-comments-list', 'get', lambda: (comments, self.auth)),
+            ('post-comments-detail', 'get', lambda: (
+                reverse('post-comments-detail', args=[self.busy_post.pk, self.comment.pk]), self.auth)),
+            ('post-comments-replies', 'get', lambda: (
+                reverse('post-comments-replies', args=[self.busy_post.pk, self.comment.pk]), self.auth)),
+            ('post-comments-create', 'post', lambda: (comments, self.json({'content': 'benchmark'}))),
+            ('post-comments-delete', 'delete', lambda: (
+                reverse('post-comments-detail', args=[self.busy_post.pk, self.new_comment().pk]), self.auth)),
+            ('post-likes-list', 'get', lambda: (likes, self.auth)),
+            ('post-likes-create', 'post', lambda: (self.unliked(like_target), self.auth)),
+            ('post-likes-delete-like', 'delete', lambda: (self.liked(unlike_target), self.auth)),
+            ('async-post-list', 'get', lambda: (reverse('async-post-list'), self.auth)),
+            ('async-post-detail', 'get', lambda: (reverse('async-post-detail', args=[self.busy_post.pk]), self.auth)),
+            ('async-post-comments-list', 'get', lambda: (
+                reverse('async-post-comments-list', args=[self.busy_post.pk]), self.auth)),
+            ('feed', 'get', lambda: (reverse('feed'), self.auth)),
+            ('author-subscription-list', 'get', lambda: (author_subscriptions, self.auth)),
+            ('author-subscription-create', 'post', lambda: (
+                self.unsubscribed(author_subscriptions), self.json({'author': self.author.username}))),
+            ('author-subscription-detail', 'delete', lambda: (
+                reverse('author-subscription-detail', args=[self.author_subscription().pk]), self.auth)),
+            ('tag-subscription-list', 'get', lambda: (tag_subscriptions, self.auth)),
+            ('tag-subscription-create', 'post', lambda: (
+                self.unsubscribed(tag_subscriptions), self.json({'tag': self.tag.name}))),
+            ('tag-subscription-detail', 'delete', lambda: (
+                reverse('tag-subscription-detail', args=[self.tag_subscription().pk]), self.auth)),
+            ('export', 'get', lambda: (reverse('export') + '?types=posts', self.admin_auth)),
+            ('stats', 'get', lambda: (reverse('stats'), self.admin_auth)),
+            ('route-stats', 'get', lambda: (reverse('route-stats'), self.admin_auth)),
+            ('notification-list', 'get', lambda: (notifications, self.auth)),
+            ('notification-detail', 'get', lambda: (
+                reverse('notification-detail', args=[self.notification.pk]), self.auth)),
+            ('notification-unread-count', 'get', lambda: (reverse('notification-unread-count'), self.auth)),
+            ('notification-mark-read', 'post', lambda: (
+                reverse('notification-mark-read'), self.json({'ids': [self.notification.pk]}))),
+            ('notification-mark-one-read', 'post', lambda: (
+                reverse('notification-mark-one-read', args=[self.notification.pk]), self.auth)),
+            ('notification-mark-all-read', 'post', lambda: (reverse('notification-mark-all-read'), self.auth)),
+            ('notification-stream-ticket', 'post', lambda: (reverse('notification-stream-ticket'), self.auth)),
+            ('jwt-create', 'post', lambda: (reverse('jwt-create'), self.json(
+                {'email': self.user.email, 'password': SEED_PASSWORD}, auth=False))),
+            ('jwt-refresh', 'post', lambda: (reverse('jwt-refresh'), self.json({'refresh': self.refresh}, auth=False))),
+            ('jwt-verify', 'post', lambda: (reverse('jwt-verify'), self.json(
+                {'token': self.auth['HTTP_AUTHORIZATION'].split()[1]}, auth=False))),
+        ]
@@ -0,0 +1,117 @@
+import asyncio
+import os
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from blog.models import Post
+from blog.seed import seed_dataset
+from .benchmark import percentile
+
+
+async def asgi_get(app, path, headers):
+    """Один GET через ASGI-приложение в этом же процессе; возвращает статус ответа."""
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+        'headers': [(name.encode('latin1'), value.encode('latin1')) for name, value in headers.items()],
+        'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+    }
+    body_sent = False
+    status = None
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Клиент не отключается: ждём, пока обработчик сам не отменит ожидание
+        await asyncio.Future()
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+    return status
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает синхронные и асинхронные маршруты чтения постов и комментариев под ASGI: '
+        'одинаковая нагрузка с заданным числом одновременных запросов, запросы/с, p50 и p99. '
+        'Запросы идут через ASGIHandler, как у сервера: синхронный код каждого запроса - в своём потоке. '
+        'Поэтому данные должны быть закоммичены: --seed добавляет их в базу и не удаляет. '
+        'Оба варианта отдают одни и те же валидаторы, но запросы идут без условных заголовков: '
+        'сравниваются только полные ответы 200. Соединения с базой, как в blog_project.asgi, '
+        'не переживают запрос, если DB_CONN_MAX_AGE не задан.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Запросов на каждый замер')
+        parser.add_argument('--concurrency', default='1,10,50', help='Уровни одновременности через запятую')
+        parser.add_argument('--anonymous', action='store_true', help='Без токена (ответы из кэша)')
+        parser.add_argument('--seed', action='store_true', help='Сгенерировать данные перед замером')
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=5000)
+        parser.add_argument('--likes', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',') if level.strip()]
+        except ValueError:
+            raise CommandError('--concurrency must be a comma-separated list of integers.')
+
+        if options['seed']:
+            seed_dataset(users=options['users'], posts=options['posts'], comments=options['comments'],
+                         likes=options['likes'], notifications=0)
+
+        if 'DB_CONN_MAX_AGE' not in os.environ:
+            for alias in connections:
+                connections[alias].settings_dict['CONN_MAX_AGE'] = 0
+
+        post = Post.objects.order_by('-comments_count').first()
+        if post is None:
+            raise CommandError('No posts to benchmark, run with --seed.')
+        headers = {'host': 'localhost'}
+        if not options['anonymous']:
+            headers['authorization'] = f'Bearer {RefreshToken.for_user(post.author).access_token}'
+
+        routes = [
+            ('post-list', reverse('post-list') + '?cursor=', reverse('async-post-list')),
+            ('post-detail', reverse('post-detail', args=[post.pk]), reverse('async-post-detail', args=[post.pk])),
+            ('post-comments-list', reverse('post-comments-list', args=[post.pk]) + '?cursor=',
+             reverse('async-post-comments-list', args=[post.pk])),
+        ]
+        self.stdout.write(f'{"route":<20} {"mode":<6} {"conc":>5} {"status":>7} {"req/s":>9} {"p50 ms":>9} {"p99 ms":>9}')
+        for name, sync_path, async_path in routes:
+            for concurrency in levels:
+                for mode, path in (('sync', sync_path), ('async', async_path)):
+                    rate, timings, statuses = async_to_sync(self.load)(path, headers, options['requests'], concurrency)
+                    self.stdout.write(
+                        f'{name:<20} {mode:<6} {concurrency:>5} {",".join(map(str, sorted(statuses))):>7} '
+                        f'{rate:>9.1f} {percentile(timings, 0.5):>9.2f} {percentile(timings, 0.99):>9.2f}'
+                    )
+
+    async def load(self, path, headers, total, concurrency):
+        app = get_asgi_application()
+        semaphore = asyncio.Semaphore(concurrency)
+        timings, statuses = [], set()
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                statuses.add(await asgi_get(app, path, headers))
+                timings.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return total / (time.perf_counter() - started), timings, statuses
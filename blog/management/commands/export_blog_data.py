@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import export
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты, комментарии и лайки в NDJSON (по записи на строку)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Файл для выгрузки, по умолчанию stdout')
+        parser.add_argument('--types', help='Через запятую: posts, comments, likes (по умолчанию все)')
+        parser.add_argument('--updated-since', help='Выгрузить только изменённое с этого момента (ISO 8601)')
+        parser.add_argument('--chunk-size', type=int, default=export.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            types = export.parse_types(options['types'])
+            since = export.parse_since(options['updated_since'])
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        lines = export.export_lines(types, since, options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
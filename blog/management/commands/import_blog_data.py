@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.importer import BlogImporter, CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты, теги, комментарии и лайки из JSONL (формат export_blog_data). '
+        'Комментарии должны идти после родителей, лайки и комментарии - после своих постов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл JSONL')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Строк на транзакцию')
+        parser.add_argument('--checkpoint', help='Файл контрольной точки, по умолчанию <path>.checkpoint')
+        parser.add_argument('--resume', action='store_true', help='Продолжить с контрольной точки')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть положительным')
+        checkpoint = options['checkpoint'] or f'{options["path"]}.checkpoint'
+        try:
+            result = BlogImporter(self.stdout, options['chunk_size']).run(options['path'], checkpoint, options['resume'])
+        except FileNotFoundError as error:
+            raise CommandError(str(error))
+        total = result['post'] + result['comment'] + result['like']
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано: постов {result["post"]}, комментариев {result["comment"]}, лайков {result["like"]}, '
+            f'пропущено {result["skipped"]}, уже были в базе {result["existing"]}, деревьев пересобрано {result["trees"]}; '
+            f'{total / max(result["seconds"], 1e-9):.0f} записей/с'
+        ))
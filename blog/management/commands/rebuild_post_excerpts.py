@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post, make_excerpt
+from blog.response_cache import POSTS_SCOPE, bump_version
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает анонсы (excerpt) постов, например после добавления поля или массового импорта'
+
+    def handle(self, *args, **options):
+        updated = 0
+        batch = []
+        for post in Post.objects.only('id', 'content', 'excerpt').iterator(chunk_size=BATCH_SIZE):
+            excerpt = make_excerpt(post.content)
+            if post.excerpt != excerpt:
+                post.excerpt = excerpt
+                batch.append(post)
+            if len(batch) >= BATCH_SIZE:
+                updated += Post.objects.bulk_update(batch, ['excerpt'])
+                batch = []
+        if batch:
+            updated += Post.objects.bulk_update(batch, ['excerpt'])
+        bump_version(POSTS_SCOPE)
+        self.stdout.write(self.style.SUCCESS(f'Обновлено анонсов: {updated}'))
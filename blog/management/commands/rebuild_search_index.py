@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from blog import search
+from blog.response_cache import POSTS_SCOPE, bump_version
+
+
+class Command(BaseCommand):
+    help = 'Пересоздаёт полнотекстовый индекс постов (SQLite FTS5)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if not search.is_supported(using):
+            raise CommandError('Полнотекстовый индекс FTS5 поддерживается только для SQLite')
+        indexed = search.rebuild_index(using)
+        bump_version(POSTS_SCOPE)
+        self.stdout.write(self.style.SUCCESS(f'Проиндексировано постов: {indexed}'))
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from blog.models import Post, Like, Comment
+from blog.response_cache import POSTS_SCOPE, bump_version
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики постов (likes_count, comments_count) по лайкам и комментариям'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить счётчики и вывести расхождения, ничего не меняя',
+        )
+
+    def handle(self, *args, **options):
+        likes = self.count_subquery(Like)
+        comments = self.count_subquery(Comment)
+
+        if options['check']:
+            mismatched = (
+                Post.objects.annotate(
+                    actual_likes=Coalesce(Subquery(likes), Value(0)),
+                    actual_comments=Coalesce(Subquery(comments), Value(0)),
+                )
+                .filter(~Q(likes_count=F('actual_likes')) | ~Q(comments_count=F('actual_comments')))
+                .values_list('pk', 'likes_count', 'actual_likes', 'comments_count', 'actual_comments')
+            )
+            rows = list(mismatched)
+            for pk, stored_likes, actual_likes, stored_comments, actual_comments in rows:
+                self.stdout.write(
+                    f'Post {pk}: likes_count={stored_likes}, actual={actual_likes}; '
+                    f'comments_count={stored_comments}, actual={actual_comments}'
+                )
+            if rows:
+                self.stdout.write(self.style.ERROR(f'Расхождений: {len(rows)}'))
+            else:
+                self.stdout.write(self.style.SUCCESS('Все счётчики корректны'))
+            return
+
+        updated = Post.objects.update(
+            likes_count=Coalesce(Subquery(likes), Value(0)),
+            comments_count=Coalesce(Subquery(comments), Value(0)),
+        )
+        bump_version(POSTS_SCOPE)
+        self.stdout.write(self.style.SUCCESS(f'Пересчитано постов: {updated}'))
+
+    def count_subquery(self, model):
+        return (
+            model.objects.filter(post=OuterRef('pk'))
+            .order_by()
+            .values('post')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
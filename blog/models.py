@@ -1,11 +1,19 @@
 from django.db import models
+from django.db.models.functions import Collate
 from django.contrib.auth import get_user_model
-from django.utils.text import slugify
+from django.utils.text import slugify, Truncator
 from mptt.models import MPTTModel, TreeForeignKey
 # Create your models here.
 
 User = get_user_model()
 
+EXCERPT_LENGTH = 200
+
+
+def make_excerpt(content):
+    # Одна строка без лишних пробелов, обрезанная по границе слова
+    return Truncator(' '.join(content.split())).chars(EXCERPT_LENGTH)
+
 class Tag(models.Model):
     name = models.CharField('название',max_length=50, unique=True)
 
@@ -65,15 +73,34 @@ class Post(models.Model):
     category = models.CharField(choices=CATEGORY_CHOICES, default='OTHER', verbose_name='Категория')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
+    # Денормализованный счётчик, меняется только через F-выражения
+    likes_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество лайков')
+    comments_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев')
+    # Начало текста для списков, чтобы не читать и не отдавать content целиком
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False, verbose_name='Анонс')
 
     class Meta:
         ordering = ['-created_at']
-        indexes = [models.Index(fields=['created_at'])]
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['likes_count']),
+            models.Index(fields=['comments_count']),
+            # Поиск в админке по началу названия: регистронезависимый LIKE использует только NOCASE-индекс
+            models.Index(Collate('title', 'NOCASE'), name='blog_post_title_nocase_idx'),
+        ]
         verbose_name_plural = 'Posts'
         verbose_name = 'Post'
 
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        if 'content' not in self.get_deferred_fields():
+            self.excerpt = make_excerpt(self.content)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'content' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
     
 
 class Comment(MPTTModel):
@@ -97,8 +124,10 @@ class Comment(MPTTModel):
 class Like(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='Пользователь')
     post = models.ForeignKey(Post, on_delete=models.CASCADE, verbose_name='Пост')
-    
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+
     class Meta:
+        indexes = [models.Index(fields=['post', 'created_at'])]
         constraints = [
             models.UniqueConstraint(
                 fields=['user', 'post'], 
@@ -109,4 +138,56 @@ class Like(models.Model):
         verbose_name = 'Like'
 
     def __str__(self):
-        return f'{self.user} likes {self.post}'
\ No newline at end of file
+        return f'{self.user} likes {self.post}'
+
+
+class PostScore(models.Model):
+    # Рейтинг хранится в логарифмической шкале: log(sum(w * 2^(t / half_life))).
+    # Так затухание не требует пересчёта - более старые события просто весят меньше.
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='trending_score', verbose_name='Пост')
+    category = models.CharField(max_length=20, verbose_name='Категория')
+    score = models.FloatField(verbose_name='Рейтинг')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score']),
+            models.Index(fields=['category', '-score']),
+        ]
+        verbose_name_plural = 'Post scores'
+        verbose_name = 'Post score'
+
+    def __str__(self):
+        return f'{self.post_id}: {self.score}'
+
+
+class AuthorSubscription(models.Model):
+    subscriber = models.ForeignKey(User, related_name='author_subscriptions', on_delete=models.CASCADE, verbose_name='Подписчик')
+    author = models.ForeignKey(User, related_name='subscribers', on_delete=models.CASCADE, verbose_name='Автор')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата подписки')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['subscriber', 'author'], name='unique_author_subscription')
+        ]
+        verbose_name_plural = 'Author subscriptions'
+        verbose_name = 'Author subscription'
+
+    def __str__(self):
+        return f'{self.subscriber} follows {self.author}'
+
+
+class TagSubscription(models.Model):
+    subscriber = models.ForeignKey(User, related_name='tag_subscriptions', on_delete=models.CASCADE, verbose_name='Подписчик')
+    tag = models.ForeignKey(Tag, related_name='subscribers', on_delete=models.CASCADE, verbose_name='Тег')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата подписки')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['subscriber', 'tag'], name='unique_tag_subscription')
+        ]
+        verbose_name_plural = 'Tag subscriptions'
+        verbose_name = 'Tag subscription'
+
+    def __str__(self):
+        return f'{self.subscriber} follows {self.tag}'
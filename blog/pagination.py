@@ -0,0 +1,141 @@
+import json
+from base64 import b64decode, b64encode
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    По умолчанию ведёт себя как PageNumberPagination. Если в запросе есть ?cursor=
+    (можно пустой), включается keyset-пагинация: без COUNT(*) и OFFSET, позиция задаётся
+    значением первого поля сортировки и id как уникальным тай-брейкером.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if self.use_cursor:
+            self.key_field, self.descending = self.get_key(queryset)
+            if self.key_field is None:
+                # Сортировка по вычисляемому полю (например, релевантности поиска)
+                self.use_cursor = False
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        queryset, page_size, position, reverse = self.cursor_page(queryset, request)
+        return self.finish_page(list(queryset[:page_size + 1]), page_size, position, reverse)
+
+    async def apaginate_queryset(self, queryset, request):
+        """Асинхронный вариант, только keyset: без номеров страниц и их COUNT(*)."""
+        self.use_cursor = True
+        self.key_field, self.descending = self.get_key(queryset)
+        if self.key_field is None:
+            raise ValueError('Keyset pagination needs ordering by a concrete field.')
+        queryset, page_size, position, reverse = self.cursor_page(queryset, request)
+        # chunk_size обязателен, чтобы prefetch_related работал с aiterator
+        results = [obj async for obj in queryset[:page_size + 1].aiterator(chunk_size=page_size + 1)]
+        return self.finish_page(results, page_size, position, reverse)
+
+    def cursor_page(self, queryset, request):
+        self.request = request
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        # При движении назад направление сортировки инвертируется
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        ordering = [prefix + self.key_field.name]
+        if not self.key_field.primary_key:
+            ordering.append(prefix + 'pk')
+        queryset = queryset.order_by(*ordering)
+
+        if position is not None:
+            queryset = queryset.filter(self.position_filter(position, descending))
+        return queryset, page_size, position, reverse
+
+    def finish_page(self, results, page_size, position, reverse):
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page_results = results
+        return results
+
+    def get_key(self, queryset):
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering) or ['-pk']
+        field_name = ordering[0]
+        if not isinstance(field_name, str):
+            return None, False
+        descending = field_name.startswith('-')
+        field_name = field_name.lstrip('-')
+        try:
+            field = queryset.model._meta.pk if field_name == 'pk' else queryset.model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            return None, False
+        if not field.concrete or field.is_relation:
+            return None, False
+        return field, descending
+
+    def position_filter(self, position, descending):
+        value, pk = position
+        lookup = 'lt' if descending else 'gt'
+        if self.key_field.primary_key:
+            return Q(**{f'pk__{lookup}': pk})
+        return (
+            Q(**{f'{self.key_field.name}__{lookup}': value})
+            | Q(**{self.key_field.name: value, f'pk__{lookup}': pk})
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            value = self.key_field.to_python(data['v'])
+            return (value, int(data['id'])), bool(data.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse):
+        data = {'v': self.key_field.value_to_string(obj), 'id': obj.pk}
+        if reverse:
+            data['r'] = 1
+        encoded = b64encode(json.dumps(data).encode('utf-8')).decode('ascii')
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super().get_next_link()
+        if not self.has_next or not self.page_results:
+            return None
+        return self.encode_cursor(self.page_results[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.use_cursor:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page_results:
+            return None
+        return self.encode_cursor(self.page_results[0], reverse=True)
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response(self.get_paginated_data(data))
@@ -0,0 +1,120 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import stats
+from blog_project.db_router import stick_to_primary
+
+# Поднимается при массовых изменениях (команды пересчёта, импорт), сбрасывает все ответы постов
+POSTS_SCOPE = 'posts'
+POST_LIST_SCOPE = 'posts:list'
+
+stats.register('response_cache.hit', 'response_cache.miss')
+
+
+def post_detail_scope(post_id):
+    return f'posts:detail:{post_id}'
+
+
+def comment_list_scope(post_id):
+    return f'comments:list:{post_id}'
+
+
+def get_versions(scopes):
+    keys = [f'version:{scope}' for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Начальная версия - время в нс: после вытеснения ключа старые записи не совпадут
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+async def aget_versions(scopes):
+    keys = [f'version:{scope}' for scope in scopes]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, time.time_ns(), None)
+            versions[key] = await cache.aget(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(*scopes):
+    for scope in scopes:
+        key = f'version:{scope}'
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def bump_on_commit(*scopes, using=None):
+    """
+    Поднимает версии после коммита записи: иначе параллельный GET успел бы прочитать
+    ещё старые строки и положить их в кэш под новой версией.
+    """
+    transaction.on_commit(lambda: bump_version(*scopes), using=using)
+
+
+def response_key(scopes, request, versions=None, prefix='response'):
+    params = urlencode(sorted(request.query_params.lists()), doseq=True)
+    digest = hashlib.md5(params.encode('utf-8')).hexdigest()
+    if versions is None:
+        versions = get_versions(scopes)
+    versions = ':'.join(str(version) for version in versions)
+    return f'{prefix}:{scopes[-1]}:{versions}:{digest}'
+
+
+class CachedResponseMixin:
+    """
+    Кэширует ответы на GET для анонимных пользователей. Ключ включает версии scope'ов
+    и параметры запроса (фильтры, поиск, сортировка, страница); сигналы моделей
+    поднимают версию, и старые записи просто перестают читаться.
+    """
+
+    def cached_response(self, request, scopes, build, *args, **kwargs):
+        if request.user.is_authenticated:
+            return build(request, *args, **kwargs)
+
+        key = response_key(scopes, request)
+        data = cache.get(key)
+        if data is not None:
+            stats.incr('response_cache.hit')
+            return Response(data)
+
+        stats.incr('response_cache.miss')
+        # То, что ляжет в кэш под текущей версией, читаем из основной базы: реплика может отставать
+        stick_to_primary()
+        response = build(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        return response
+
+
+async def acached_data(request, scopes, build):
+    """
+    То же для асинхронных представлений: build - корутина, возвращающая данные ответа
+    (ошибки она поднимает исключениями). Ключи отдельные: формат ответов у них свой.
+    """
+    if request.user.is_authenticated:
+        return await build()
+
+    key = response_key(scopes, request, await aget_versions(scopes), prefix='async-response')
+    data = await cache.aget(key)
+    if data is not None:
+        await stats.aincr('response_cache.hit')
+        return data
+
+    await stats.aincr('response_cache.miss')
+    stick_to_primary()
+    data = await build()
+    await cache.aset(key, data, settings.RESPONSE_CACHE_TIMEOUT)
+    return data
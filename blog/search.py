@@ -0,0 +1,119 @@
+import html
+import re
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+from .models import Post
+
+SEARCH_TABLE = 'blog_post_fts'
+SNIPPET_TOKENS = 16
+# snippet() отдаёт текст поста как есть: подсветку он размечает этими управляющими
+# символами, а в <mark> они превращаются уже после экранирования текста
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+
+def is_supported(using='default'):
+    return connections[using].vendor == 'sqlite'
+
+
+def ensure_search_table(using='default'):
+    if not is_supported(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+            f"USING fts5(title, content, tokenize='unicode61 remove_diacritics 2')"
+        )
+
+
+def index_post(post, using='default'):
+    if not is_supported(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [post.pk])
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, title, content) VALUES (%s, %s, %s)',
+            [post.pk, post.title, post.content],
+        )
+
+
+def unindex_post(post_id, using='default'):
+    if not is_supported(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [post_id])
+
+
+def rebuild_index(using='default'):
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+    ensure_search_table(using)
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, title, content) '
+            f'SELECT id, title, content FROM {Post._meta.db_table}'
+        )
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT count(*) FROM {SEARCH_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def render_snippet(raw):
+    """HTML сниппета: экранированный текст поста, из разметки - только <mark>."""
+    return html.escape(raw).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
+
+
+def build_match_query(text):
+    # Каждое слово ищем по префиксу, все слова должны встретиться (AND)
+    terms = re.findall(r'\w+', text.lower())
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+class PostSearchFilter(filters.SearchFilter):
+    """
+    Полнотекстовый поиск по FTS5-индексу постов с ранжированием bm25 и сниппетами.
+    На других СУБД работает как обычный SearchFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if not is_supported(queryset.db):
+            return super().filter_queryset(request, queryset, view)
+
+        match = build_match_query(request.query_params.get(self.search_param, ''))
+        if not match:
+            return queryset
+
+        # Один JOIN с индексом: MATCH, bm25 и snippet считаются за один проход FTS5
+        post_table = queryset.model._meta.db_table
+        queryset = queryset.extra(
+            tables=[SEARCH_TABLE],
+            where=[f'{SEARCH_TABLE}.rowid = {post_table}.id', f'{SEARCH_TABLE} MATCH %s'],
+            params=[match],
+            select={
+                'search_rank': f'bm25({SEARCH_TABLE}, 10.0, 1.0)',
+                'search_snippet': f"snippet({SEARCH_TABLE}, -1, char(2), char(3), '…', {SNIPPET_TOKENS})",
+            },
+        )
+        # Явная сортировка из ?ordering= важнее релевантности
+        if not request.query_params.get(filters.OrderingFilter.ordering_param):
+            queryset = queryset.order_by('search_rank', '-created_at')
+        return queryset
+
+    def filter_matches(self, request, queryset, view):
+        """
+        Только отбор совпадений, без ранга и сниппета. JOIN из extra() ссылается на
+        имя таблицы постов и ломается, когда queryset становится подзапросом (фасеты),
+        а фильтр по rowid работает везде.
+        """
+        if not is_supported(queryset.db):
+            return super().filter_queryset(request, queryset, view)
+
+        match = build_match_query(request.query_params.get(self.search_param, ''))
+        if not match:
+            return queryset
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', [match])
+        )
@@ -0,0 +1,132 @@
+import random
+import secrets
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db.models import Max
+
+from . import search
+from .models import Post, Tag, Comment, Like, make_excerpt
+from notifications.models import Notification
+
+User = get_user_model()
+
+SEED_PASSWORD = 'benchmark-password'
+WORDS = (
+    'python django sqlite redis celery index query cache latency throughput '
+    'машина дорога музыка кино игра путешествие рецепт спорт здоровье фото '
+    'trip guitar pasta marathon camera puppy startup lecture concert review'
+).split()
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed_comments(rng, posts, users, count):
+    """
+    Генерирует дерево комментариев (до 3 уровней) и сразу считает поля MPTT,
+    чтобы вставить всё через bulk_create без перенумерации lft/rght.
+    """
+    next_tree_id = (Comment.objects.aggregate(Max('tree_id'))['tree_id__max'] or 0) + 1
+    children = {}
+    roots = []
+    open_nodes = {}  # post_id -> узлы, на которые ещё можно отвечать
+    for _ in range(count):
+        post = rng.choice(posts)
+        candidates = open_nodes.setdefault(post.pk, [])
+        parent = rng.choice(candidates) if candidates and rng.random() < 0.6 else None
+        node = Comment(
+            post=post,
+            author=rng.choice(users),
+            content=sentence(rng, rng.randint(3, 30)),
+            parent=parent,
+            level=parent.level + 1 if parent else 0,
+            lft=0, rght=0, tree_id=0,
+        )
+        children[id(node)] = []
+        if parent is None:
+            node.tree_id = next_tree_id
+            next_tree_id += 1
+            roots.append(node)
+        else:
+            node.tree_id = parent.tree_id
+            children[id(parent)].append(node)
+        if node.level < 2:
+            candidates.append(node)
+
+    def number(node, left):
+        node.lft = left
+        right = left + 1
+        for child in children[id(node)]:
+            right = number(child, right) + 1
+        node.rght = right
+        return right
+
+    by_level = [[], [], []]
+    for root in roots:
+        number(root, 1)
+    for nodes in children.values():
+        for node in nodes:
+            by_level[node.level].append(node)
+    by_level[0] = roots
+    # Родители вставляются раньше детей, чтобы у детей был parent_id
+    for nodes in by_level:
+        Comment.objects.bulk_create(nodes, batch_size=500)
+    return roots
+
+
+def seed_dataset(users=200, posts=2000, tags=100, comments=5000, likes=10000, notifications=5000, seed=42):
+    rng = random.Random(seed)
+    prefix = f'seed{secrets.token_hex(3)}'
+    password = make_password(SEED_PASSWORD)
+
+    user_objs = User.objects.bulk_create([
+        User(username=f'{prefix}_user{i}', email=f'{prefix}_user{i}@example.com', password=password)
+        for i in range(users)
+    ], batch_size=500)
+
+    tag_objs = Tag.objects.bulk_create([Tag(name=f'{prefix}-{i}') for i in range(tags)], batch_size=500)
+
+    categories = [choice for choice, _ in Post.CATEGORY_CHOICES]
+    contents = [sentence(rng, rng.randint(50, 400)) for _ in range(posts)]
+    post_objs = Post.objects.bulk_create([
+        Post(
+            author=rng.choice(user_objs),
+            title=sentence(rng, rng.randint(2, 8)),
+            content=content,
+            excerpt=make_excerpt(content),
+            category=rng.choice(categories),
+        )
+        for content in contents
+    ], batch_size=500)
+
+    Post.tags.through.objects.bulk_create([
+        Post.tags.through(post_id=post.pk, tag_id=tag.pk)
+        for post in post_objs
+        for tag in rng.sample(tag_objs, min(len(tag_objs), rng.randint(0, 5)))
+    ], batch_size=500)
+
+    seed_comments(rng, post_objs, user_objs, comments)
+
+    pairs = {(rng.choice(user_objs).pk, rng.choice(post_objs).pk) for _ in range(likes)}
+    Like.objects.bulk_create([Like(user_id=u, post_id=p) for u, p in pairs], batch_size=500)
+
+    Notification.objects.bulk_create([
+        Notification(
+            user=rng.choice(user_objs),
+            post=rng.choice(post_objs),
+            message=f'{rng.choice(user_objs).username} liked your post',
+            is_read=rng.random() < 0.3,
+        )
+        for _ in range(notifications)
+    ], batch_size=500)
+
+    # bulk_create обходит сигналы: счётчики и поисковый индекс пересобираем сами
+    call_command('recount_post_counters', stdout=StringIO())
+    if search.is_supported():
+        search.rebuild_index()
+
+    return {'users': user_objs, 'posts': post_objs, 'tags': tag_objs}
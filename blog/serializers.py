@@ -1,5 +1,12 @@
+from django.contrib.auth import get_user_model
 from rest_framework import serializers
-from .models import Post,Tag, Comment, Like
+from .models import Post,Tag, Comment, Like, AuthorSubscription, TagSubscription
+from .search import render_snippet
+from .tags import resolve_tag_ids
+from blog_project.instrumentation import TimedSerializerMixin
+
+
+User = get_user_model()
 
 
 # class CategorySerializer(serializers.ModelSerializer):
@@ -14,24 +21,40 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ['id','name']
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = serializers.HiddenField(default=serializers.CurrentUserDefault())
     category = serializers.ChoiceField(choices=Post.CATEGORY_CHOICES)
-    likes_count = serializers.SerializerMethodField()
     tags = serializers.ListField(
         child=serializers.CharField(max_length=50),
         write_only=True,
         required=False,
         default=list  
     )
+    # Поля ответа, которые добавляет to_representation
+    computed_fields = ['tags', 'is_liked', 'snippet']
+    # В списках вместо полного текста по умолчанию отдаётся excerpt
+    list_excluded_fields = ['content']
 
     class Meta:
         model = Post
-        fields = ['id', 'title', 'content', 'tags', 'category','author', 'created_at', 'likes_count']
-        read_only_fields = ['author', 'created_at']
+        fields = ['id', 'title', 'content', 'excerpt', 'tags', 'category','author', 'created_at', 'likes_count', 'comments_count']
+        read_only_fields = ['author', 'created_at', 'excerpt', 'likes_count', 'comments_count']
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # fields - разреженный набор полей ответа (?fields=), None - все поля
+        self.output_fields = None if fields is None else set(fields)
+        if self.output_fields is not None:
+            for name, field in list(self.fields.items()):
+                if not field.write_only and name not in self.output_fields:
+                    self.fields.pop(name)
 
-    def get_likes_count(self, obj):
-        return obj.like_set.count()
+    @classmethod
+    def output_field_names(cls):
+        return [name for name in cls.Meta.fields if name not in ('author', 'tags')] + cls.computed_fields
+
+    def includes(self, name):
+        return self.output_fields is None or name in self.output_fields
 
     def create(self, validated_data):
         # Достаём теги (по умолчанию пустой список)
@@ -39,33 +62,47 @@ class PostSerializer(serializers.ModelSerializer):
         post = Post.objects.create(**validated_data)
 
         if tags_data:
-            tag_instances = []
-            for tag_name in tags_data:
-                tag_name = tag_name.strip()
-                if tag_name:  
-                    tag, _ = Tag.objects.get_or_create(name=tag_name,)
-                    tag_instances.append(tag)
-            post.tags.add(*tag_instances)
+            post.tags.add(*resolve_tag_ids(tags_data))
 
         return post
 
+    def update(self, instance, validated_data):
+        tags_data = validated_data.pop('tags', None)
+        instance = super().update(instance, validated_data)
+        # Теги заменяем, только если клиент явно их передал
+        if tags_data is not None and 'tags' in self.initial_data:
+            instance.tags.set(resolve_tag_ids(tags_data))
+        return instance
+
     def to_representation(self, instance):
         data = super().to_representation(instance)
-        data['tags'] = [tag.name for tag in instance.tags.all()]
+        if self.includes('tags'):
+            data['tags'] = [tag.name for tag in instance.tags.all()]
+        if self.includes('is_liked'):
+            # Аннотация is_liked есть только у авторизованных запросов, см. PostViewSet.get_queryset
+            data['is_liked'] = bool(getattr(instance, 'is_liked', False))
+        # Сниппет с подсветкой есть только у результатов полнотекстового поиска
+        snippet = getattr(instance, 'search_snippet', None)
+        if snippet is not None and self.includes('snippet'):
+            data['snippet'] = render_snippet(snippet)
         return data
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = serializers.HiddenField(default=serializers.CurrentUserDefault())
     post = serializers.HiddenField(default=None)
     replies = serializers.SerializerMethodField()
+    replies_count = serializers.SerializerMethodField()
     class Meta:
         model = Comment
-        fields = ['id', 'post', 'author', 'content', 'parent', 'created_at', 'replies']
+        fields = ['id', 'post', 'author', 'content', 'parent', 'created_at', 'replies', 'replies_count']
 
     def get_replies(self, obj):
-        if obj.get_children():
-            return CommentSerializer(obj.get_children(), many=True, context=self.context).data
-        return []
+        # Если дерево собрано через build_comment_tree, дети берутся из кэша без запросов
+        return CommentSerializer(obj.get_children(), many=True, context=self.context).data
+
+    def get_replies_count(self, obj):
+        # Все ответы в поддереве, по границам MPTT без запросов
+        return (obj.rght - obj.lft - 1) // 2
     
     def validate(self, data):
         parent = data.get('parent')
@@ -76,8 +113,39 @@ class CommentSerializer(serializers.ModelSerializer):
                 )
         return data
 
-class LikeSerializer(serializers.ModelSerializer):
+class LikeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
     class Meta:
         model = Like
-        fields = ('user', 'post')
\ No newline at end of file
+        fields = ('user', 'post')
+
+
+class AuthorSubscriptionSerializer(serializers.ModelSerializer):
+    subscriber = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    author = serializers.SlugRelatedField(slug_field='username', queryset=User.objects.all())
+
+    class Meta:
+        model = AuthorSubscription
+        fields = ['id', 'subscriber', 'author', 'created_at']
+
+    def validate_author(self, author):
+        if author == self.context['request'].user:
+            raise serializers.ValidationError('You cannot subscribe to yourself.')
+        return author
+
+
+class TagNameField(serializers.SlugRelatedField):
+    def to_internal_value(self, data):
+        # Имена тегов хранятся в нижнем регистре, см. Tag.save
+        if isinstance(data, str):
+            data = data.strip().lower()
+        return super().to_internal_value(data)
+
+
+class TagSubscriptionSerializer(serializers.ModelSerializer):
+    subscriber = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    tag = TagNameField(slug_field='name', queryset=Tag.objects.all())
+
+    class Meta:
+        model = TagSubscription
+        fields = ['id', 'subscriber', 'tag', 'created_at']
@@ -0,0 +1,158 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import facets, search, trending
+from .models import Post, Tag, Like, Comment, PostScore
+from .tasks import update_trending_score
+from .response_cache import POST_LIST_SCOPE, bump_on_commit, comment_list_scope, post_detail_scope
+from .tags import tag_cache
+
+
+def create_search_table(sender, using='default', **kwargs):
+    search.ensure_search_table(using)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, using, **kwargs):
+    search.index_post(instance, using)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, using, **kwargs):
+    search.unindex_post(instance.pk, using)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_cache(sender, using, **kwargs):
+    # Сразу - для этой же транзакции; после коммита - если другой процесс успел
+    # закэшировать ещё не удалённый тег под новой версией
+    tag_cache.clear()
+    transaction.on_commit(tag_cache.clear, using=using)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_responses(sender, instance, using, **kwargs):
+    bump_on_commit(POST_LIST_SCOPE, post_detail_scope(instance.pk), using=using)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_post_tags_responses(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # Изменили посты у тега: затронуты все эти посты
+        post_ids = pk_set or []
+    else:
+        post_ids = [instance.pk]
+    bump_on_commit(POST_LIST_SCOPE, *[post_detail_scope(post_id) for post_id in post_ids], using=using)
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+def invalidate_like_responses(sender, instance, using, **kwargs):
+    # likes_count и is_liked есть и в списке постов
+    bump_on_commit(POST_LIST_SCOPE, post_detail_scope(instance.post_id), using=using)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_responses(sender, instance, using, **kwargs):
+    # comments_count есть и в списке постов
+    bump_on_commit(POST_LIST_SCOPE, comment_list_scope(instance.post_id), post_detail_scope(instance.post_id),
+                   using=using)
+
+
+def schedule_trending_update(post_id, weight, when):
+    timestamp = when.timestamp()
+    transaction.on_commit(lambda: update_trending_score.delay(post_id, weight, timestamp))
+
+
+@receiver(post_save, sender=Post)
+def post_trending(sender, instance, created, **kwargs):
+    if created:
+        schedule_trending_update(instance.pk, trending.POST_WEIGHT, instance.created_at)
+    else:
+        # Категория в таблице рейтинга денормализована для индекса (category, -score)
+        PostScore.objects.filter(post_id=instance.pk).exclude(category=instance.category).update(category=instance.category)
+
+
+@receiver(post_save, sender=Like)
+def like_trending(sender, instance, created, **kwargs):
+    if created:
+        schedule_trending_update(instance.post_id, trending.LIKE_WEIGHT, instance.created_at)
+
+
+@receiver(post_delete, sender=Like)
+def unlike_trending(sender, instance, **kwargs):
+    schedule_trending_update(instance.post_id, -trending.LIKE_WEIGHT, instance.created_at)
+
+
+@receiver(post_save, sender=Comment)
+def comment_trending(sender, instance, created, **kwargs):
+    if created:
+        schedule_trending_update(instance.post_id, trending.COMMENT_WEIGHT, instance.created_at)
+
+
+@receiver(post_delete, sender=Comment)
+def uncomment_trending(sender, instance, **kwargs):
+    schedule_trending_update(instance.post_id, -trending.COMMENT_WEIGHT, instance.created_at)
+
+
+@receiver(post_init, sender=Post)
+def remember_category(sender, instance, **kwargs):
+    # Через __dict__, чтобы отложенное (defer/only) поле не подгружалось отдельным запросом
+    instance._loaded_category = instance.__dict__.get('category')
+
+
+@receiver(post_save, sender=Post)
+def post_facets(sender, instance, created, using, **kwargs):
+    if created:
+        facets.adjust_on_commit(categories={instance.category: 1}, using=using)
+    elif instance._loaded_category is None:
+        facets.invalidate_on_commit(using=using)
+    elif instance._loaded_category != instance.category:
+        facets.adjust_on_commit(categories={instance._loaded_category: -1, instance.category: 1}, using=using)
+    instance._loaded_category = instance.category
+
+
+@receiver(pre_delete, sender=Post)
+def remember_post_tags(sender, instance, **kwargs):
+    # После удаления связи с тегами уже не прочитать
+    instance._deleted_tags = list(Post.tags.through.objects.filter(post_id=instance.pk).values_list('tag_id', flat=True))
+
+
+@receiver(post_delete, sender=Post)
+def delete_post_facets(sender, instance, using, **kwargs):
+    tags = getattr(instance, '_deleted_tags', [])
+    facets.adjust_on_commit(categories={instance.category: -1}, tags={tag_id: -1 for tag_id in tags}, using=using)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_facets(sender, using, **kwargs):
+    # Имена тегов лежат в индексе фасетов, а связи удалённого тега уходят каскадом, без m2m_changed
+    facets.invalidate_on_commit(using=using)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def post_tags_facets(sender, instance, action, reverse, model, pk_set, using, **kwargs):
+    if action == 'pre_clear':
+        # pk_set для clear не передаётся - запоминаем, что сейчас связано
+        related = instance.post_set if reverse else instance.tags
+        instance._cleared_pks = set(related.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set, delta = getattr(instance, '_cleared_pks', set()), -1
+    elif action in ('post_add', 'post_remove'):
+        delta = 1 if action == 'post_add' else -1
+    else:
+        return
+    if not pk_set:
+        return
+    if reverse:
+        facets.adjust_on_commit(tags={instance.pk: delta * len(pk_set)}, using=using)
+    else:
+        facets.adjust_on_commit(tags={tag_id: delta for tag_id in pk_set}, using=using)
@@ -0,0 +1,33 @@
+from django.core.cache import cache
+
+# Имена счётчиков, которые отдаёт StatsView
+COUNTERS = set()
+
+
+def register(*names):
+    COUNTERS.update(names)
+
+
+def incr(name, delta=1):
+    key = f'stats:{name}'
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # Ключа ещё нет (или его вытеснили из кэша)
+        if not cache.add(key, delta, None):
+            cache.incr(key, delta)
+
+
+async def aincr(name, delta=1):
+    key = f'stats:{name}'
+    try:
+        await cache.aincr(key, delta)
+    except ValueError:
+        if not await cache.aadd(key, delta, None):
+            await cache.aincr(key, delta)
+
+
+def snapshot():
+    names = sorted(COUNTERS)
+    values = cache.get_many([f'stats:{name}' for name in names])
+    return {name: values.get(f'stats:{name}', 0) for name in names}
@@ -0,0 +1,71 @@
+import hashlib
+
+from django.core.cache import cache
+
+from .models import Tag
+from .response_cache import bump_version, get_versions
+
+TAG_CACHE_SCOPE = 'tags'
+TAG_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+class TagCache:
+    """
+    Кэш name -> id в общем кэше Django, одном на все процессы. Ключи версионированы:
+    запись или удаление тега поднимает версию, и старые id перестают читаться везде.
+    """
+
+    def __init__(self, timeout=TAG_CACHE_TIMEOUT):
+        self.timeout = timeout
+
+    def key(self, name):
+        # Имена тегов могут содержать пробелы, недопустимые в ключах memcached
+        return 'tag-id:' + hashlib.md5(name.encode('utf-8')).hexdigest()
+
+    def version(self):
+        return get_versions([TAG_CACHE_SCOPE])[0]
+
+    def get_many(self, names, version):
+        found = cache.get_many([self.key(name) for name in names], version=version)
+        return {name: found[self.key(name)] for name in names if self.key(name) in found}
+
+    def set_many(self, mapping, version):
+        # Версия та, с которой читали: если её успели поднять, запись просто не будет прочитана
+        cache.set_many({self.key(name): tag_id for name, tag_id in mapping.items()}, self.timeout, version=version)
+
+    def clear(self):
+        bump_version(TAG_CACHE_SCOPE)
+
+
+tag_cache = TagCache()
+
+
+def normalize_tag_names(names):
+    # Так же, как Tag.save: без пробелов по краям и в нижнем регистре, без повторов
+    normalized = []
+    for name in names:
+        name = name.strip().lower()
+        if name and name not in normalized:
+            normalized.append(name)
+    return normalized
+
+
+def resolve_tag_ids(names):
+    """
+    Возвращает id тегов в порядке имён, создавая недостающие.
+    Не больше трёх запросов независимо от количества тегов, ноль - если всё в кэше.
+    """
+    names = normalize_tag_names(names)
+    version = tag_cache.version()
+    ids = tag_cache.get_many(names, version)
+    missing = [name for name in names if name not in ids]
+    if missing:
+        found = dict(Tag.objects.filter(name__in=missing).values_list('name', 'id'))
+        to_create = [name for name in missing if name not in found]
+        if to_create:
+            # Конкурентный запрос мог создать тот же тег - конфликт просто пропускаем
+            Tag.objects.bulk_create([Tag(name=name) for name in to_create], ignore_conflicts=True)
+            found.update(Tag.objects.filter(name__in=to_create).values_list('name', 'id'))
+        tag_cache.set_many(found, version)
+        ids.update(found)
+    return [ids[name] for name in names]
@@ -0,0 +1,21 @@
+from celery import shared_task
+
+from . import timeline, trending
+from .models import Post
+
+
+@shared_task
+def update_trending_score(post_id, weight, timestamp):
+    trending.apply_event(post_id, weight, timestamp)
+
+
+@shared_task
+def fan_out_post(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        timeline.fan_out(post)
+
+
+@shared_task
+def backfill_timeline(user_id, author_id=None, tag_id=None):
+    timeline.backfill(user_id, author_id=author_id, tag_id=tag_id)
@@ -0,0 +1,76 @@
+from unittest import mock
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from blog.admin import CappedCountPaginator
+from blog.models import Post, Comment, Like
+
+User = get_user_model()
+
+
+class AdminChangelistTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', email='admin@localhost.ru', password='testpass')
+        cls.post = Post.objects.create(title='Test Post', content='Test Content', author=cls.admin)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        for index in range(count):
+            name = f'user{User.objects.count()}'
+            user = User.objects.create_user(username=name, email=f'{name}@localhost.ru', password='testpass')
+            post = Post.objects.create(title=f'Post {index}', content='Content', author=user)
+            comment = Comment.objects.create(post=post, author=user, content='Comment')
+            Comment.objects.create(post=post, author=user, content='Reply', parent=comment)
+            Like.objects.create(user=user, post=post)
+
+    def changelist_queries(self, model):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse(f'admin:blog_{model}_changelist'))
+        self.assertEqual(response.status_code, 200)
+        return len(captured)
+
+    def test_changelist_queries_do_not_depend_on_rows(self):
+        self.add_rows(2)
+        before = {model: self.changelist_queries(model) for model in ['post', 'comment', 'like']}
+        self.add_rows(5)
+        after = {model: self.changelist_queries(model) for model in ['post', 'comment', 'like']}
+        self.assertEqual(before, after)
+
+    def test_reply_count_is_annotated(self):
+        self.add_rows(1)
+        response = self.client.get(reverse('admin:blog_comment_changelist'), {'o': '6'})
+        counts = sorted(comment.reply_count for comment in response.context['cl'].result_list)
+        self.assertEqual(counts, [0, 1])
+
+    def test_search_by_title_prefix(self):
+        self.add_rows(2)
+        response = self.client.get(reverse('admin:blog_post_changelist'), {'q': '"post 1"'})
+        self.assertEqual([post.title for post in response.context['cl'].result_list], ['Post 1'])
+
+    def test_title_search_uses_index(self):
+        queryset = Post.objects.filter(title__istartswith='post')
+        self.assertIn('blog_post_title_nocase_idx', queryset.explain())
+
+    def test_count_is_capped(self):
+        self.add_rows(3)
+        paginator = CappedCountPaginator(Post.objects.all(), 2)
+        paginator.COUNT_LIMIT = 3
+        self.assertEqual(paginator.count, 3)
+        self.assertTrue(paginator.capped)
+        # С дальней страницы счёт продолжается, так что все строки достижимы
+        paginator = CappedCountPaginator(Post.objects.all(), 2, page_number=2)
+        paginator.COUNT_LIMIT = 3
+        self.assertEqual(paginator.count, 4)
+        self.assertFalse(paginator.capped)
+
+    def test_capped_count_is_marked_in_changelist(self):
+        self.add_rows(3)
+        with mock.patch.object(CappedCountPaginator, 'COUNT_LIMIT', 2):
+            response = self.client.get(reverse('admin:blog_post_changelist'))
+        self.assertContains(response, '2+ Posts')
@@ -0,0 +1,120 @@
+import json
+from asgiref.sync import sync_to_async
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from blog.models import Post, Comment, Like, Tag
+
+User = get_user_model()
+
+
+class AsyncReadViewsTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='testuser@localhost.ru', password='testpass')
+        cls.posts = [Post.objects.create(title=f'Post {i}', content='Content', author=cls.user,
+                                         category='CARS' if i % 2 else 'OTHER') for i in range(12)]
+        cls.posts[-1].tags.add(Tag.objects.create(name='python'))
+        Like.objects.create(user=cls.user, post=cls.posts[-1])
+        root = Comment.objects.create(post=cls.posts[0], author=cls.user, content='root')
+        reply = Comment.objects.create(post=cls.posts[0], author=cls.user, content='reply', parent=root)
+        Comment.objects.create(post=cls.posts[0], author=cls.user, content='nested', parent=reply)
+        Comment.objects.create(post=cls.posts[0], author=cls.user, content='other root')
+        cls.token = str(RefreshToken.for_user(cls.user).access_token)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def auth(self):
+        return {'Authorization': f'Bearer {self.token}'}
+
+    async def get(self, name, args=(), params=None, headers=None):
+        response = await self.async_client.get(reverse(name, args=args), params or {}, headers=headers)
+        return response, json.loads(response.content)
+
+    async def test_post_list_matches_sync_keyset_page(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        expected = (await sync_to_async(self.client.get)(reverse('post-list'), {'cursor': ''})).json()
+        response, data = await self.get('async-post-list', headers=self.auth())
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(data['results'], expected['results'])
+        self.assertTrue(data['results'][0]['is_liked'])
+        self.assertEqual(data['results'][0]['tags'], ['python'])
+
+        cursor = parse_qs(urlsplit(data['next']).query)['cursor'][0]
+        _, second = await self.get('async-post-list', params={'cursor': cursor}, headers=self.auth())
+        self.assertEqual(len(data['results']) + len(second['results']), len(self.posts))
+        self.assertIsNone(second['next'])
+
+    async def test_post_list_filters_and_fields(self):
+        _, data = await self.get('async-post-list', params={'category': 'CARS', 'fields': 'id,title'})
+        self.assertEqual(len(data['results']), 6)
+        self.assertEqual(set(data['results'][0]), {'id', 'title'})
+
+        response, data = await self.get('async-post-list', params={'search': 'post', 'fields': 'password'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('search', data)
+        response, data = await self.get('async-post-list', params={'fields': 'password'})
+        self.assertIn('password', data['fields'])
+
+    async def test_post_detail(self):
+        post = self.posts[-1]
+        response, data = await self.get('async-post-detail', args=[post.pk], headers=self.auth())
+        self.assertEqual(data['content'], 'Content')
+        self.assertTrue(data['is_liked'])
+        response, data = await self.get('async-post-detail', args=[0])
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    async def test_bad_token_is_rejected(self):
+        response, data = await self.get('async-post-list', headers={'Authorization': 'Bearer broken'})
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        self.assertEqual(data['code'], 'token_not_valid')
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+
+    async def test_anonymous_responses_are_cached(self):
+        # SQL асинхронных представлений тоже попадает в метрики запроса
+        response, _ = await self.get('async-post-list')
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+        response, _ = await self.get('async-post-list')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('desc="0 queries"', response['Server-Timing'])
+
+    async def test_conditional_requests(self):
+        for name, args in (('async-post-list', []), ('async-post-detail', [self.posts[0].pk]),
+                           ('async-post-comments-list', [self.posts[0].pk])):
+            for headers in ({}, self.auth()):
+                response, _ = await self.get(name, args=args, headers=headers)
+                self.assertIn('ETag', response)
+                self.assertIn('Authorization', response['Vary'])
+                conditions = [{'If-None-Match': response['ETag']}]
+                # Last-Modified, как и у синхронных маршрутов, только у комментариев
+                self.assertEqual('Last-Modified' in response, name == 'async-post-comments-list')
+                if 'Last-Modified' in response:
+                    conditions.append({'If-Modified-Since': response['Last-Modified']})
+                for condition in conditions:
+                    repeated = await self.async_client.get(reverse(name, args=args), headers={**headers, **condition})
+                    self.assertEqual(repeated.status_code, HTTPStatus.NOT_MODIFIED)
+
+        # Анонимный и авторизованный ответы различаются (is_liked), значит и ETag
+        anonymous, _ = await self.get('async-post-list')
+        authorized, _ = await self.get('async-post-list', headers=self.auth())
+        self.assertNotEqual(anonymous['ETag'], authorized['ETag'])
+
+    async def test_comment_threads(self):
+        response, data = await self.get('async-post-comments-list', args=[self.posts[0].pk])
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        expected = await sync_to_async(self.client.get)(reverse('post-comments-list', args=[self.posts[0].pk]), {'cursor': ''})
+        self.assertEqual(data['results'], expected.json()['results'])
+        self.assertEqual([c['content'] for c in data['results']], ['root', 'other root'])
+        self.assertEqual(data['results'][0]['replies'][0]['replies'][0]['content'], 'nested')
+
+    async def test_writes_are_not_allowed(self):
+        response = await self.async_client.post(reverse('async-post-list'), headers=self.auth())
+        self.assertEqual(response.status_code, HTTPStatus.METHOD_NOT_ALLOWED)
@@ -0,0 +1,131 @@
+from http import HTTPStatus
+from unittest import mock
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from blog.models import Post, Comment
+
+User = get_user_model()
+
+
+class CommentTreeTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='testuser@localhost.ru', password='testpass')
+        cls.post = Post.objects.create(title='Test Post', content='Test Content', author=cls.user)
+        cls.root = Comment.objects.create(post=cls.post, author=cls.user, content='root')
+        cls.reply = Comment.objects.create(post=cls.post, author=cls.user, content='reply', parent=cls.root)
+        cls.nested = Comment.objects.create(post=cls.post, author=cls.user, content='nested', parent=cls.reply)
+        cls.other_root = Comment.objects.create(post=cls.post, author=cls.user, content='other root')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        patcher = mock.patch('blog.signals.update_trending_score.delay')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def add_thread(self, size):
+        for _ in range(size):
+            root = Comment.objects.create(post=self.post, author=self.user, content='root')
+            reply = Comment.objects.create(post=self.post, author=self.user, content='reply', parent=root)
+            Comment.objects.create(post=self.post, author=self.user, content='nested', parent=reply)
+
+    def test_list_returns_each_reply_once(self):
+        response = self.client.get(reverse('post-comments-list', args=[self.post.pk]))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        results = response.data['results']
+        self.assertEqual([c['id'] for c in results], [self.root.pk, self.other_root.pk])
+        reply = results[0]['replies'][0]
+        self.assertEqual(reply['id'], self.reply.pk)
+        self.assertEqual(reply['replies'][0]['id'], self.nested.pk)
+        self.assertEqual(reply['replies'][0]['replies'], [])
+
+    def test_retrieve_returns_subtree(self):
+        response = self.client.get(reverse('post-comments-detail', args=[self.post.pk, self.reply.pk]))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.data['replies'][0]['id'], self.nested.pk)
+
+    def test_list_query_count_does_not_depend_on_thread_size(self):
+        url = reverse('post-comments-list', args=[self.post.pk])
+        # агрегат для валидаторов + count + страница корней + деревья этих корней
+        with self.assertNumQueries(4):
+            self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_thread(5)
+        with self.assertNumQueries(4):
+            self.client.get(url)
+
+    def test_replies_are_limited_to_preview(self):
+        replies = [Comment.objects.create(post=self.post, author=self.user, content=f'r{i}', parent=self.other_root)
+                   for i in range(5)]
+        response = self.client.get(reverse('post-comments-list', args=[self.post.pk]))
+        thread = response.data['results'][1]
+        self.assertEqual([c['id'] for c in thread['replies']], [r.pk for r in replies[:3]])
+        self.assertEqual(thread['replies_count'], 5)
+        self.assertEqual(response.data['results'][0]['replies_count'], 2)
+
+    def test_replies_endpoint_paginates_children(self):
+        replies = [Comment.objects.create(post=self.post, author=self.user, content=f'r{i}', parent=self.other_root)
+                   for i in range(12)]
+        nested = Comment.objects.create(post=self.post, author=self.user, content='nested', parent=replies[10])
+        url = reverse('post-comments-replies', args=[self.post.pk, self.other_root.pk])
+        # комментарий + count + страница ответов + их ответы
+        with self.assertNumQueries(4):
+            response = self.client.get(url, {'page': 2})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.data['count'], 12)
+        self.assertEqual([c['id'] for c in response.data['results']], [replies[10].pk, replies[11].pk])
+        self.assertEqual(response.data['results'][0]['replies'][0]['id'], nested.pk)
+
+
+class CommentsCountTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='testuser@localhost.ru', password='testpass')
+        cls.post = Post.objects.create(title='Test Post', content='Test Content', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def comment(self, parent=None):
+        data = {'content': 'text'}
+        if parent:
+            data['parent'] = parent
+        response = self.client.post(reverse('post-comments-list', args=[self.post.pk]), data)
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        return response.data['id']
+
+    def test_counter_follows_create_and_delete(self):
+        root = self.comment()
+        reply = self.comment(root)
+        self.comment(reply)
+        self.comment()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 4)
+
+        # удаление ветки убирает и все ответы в ней
+        response = self.client.delete(reverse('post-comments-detail', args=[self.post.pk, root]))
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        response = self.client.get(reverse('post-detail', args=[self.post.pk]))
+        self.assertEqual(response.data['comments_count'], 1)
+
+    def test_recount_command(self):
+        Comment.objects.create(post=self.post, author=self.user, content='text')
+        out = StringIO()
+        call_command('recount_post_counters', '--check', stdout=out)
+        self.assertIn('comments_count=0, actual=1', out.getvalue())
+        call_command('recount_post_counters', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
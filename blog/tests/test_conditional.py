@@ -0,0 +1,138 @@
+from datetime import timedelta
+from http import HTTPStatus
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.urls import reverse
+from django.utils.http import http_date
+from django.contrib.auth import get_user_model
+from blog.models import Post, Comment, Like
+
+User = get_user_model()
+
+
+class ConditionalGetTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='testuser@localhost.ru', password='testpass')
+        cls.other_user = User.objects.create_user(username='otheruser', email='otheruser@localhost.ru', password='testpass')
+        cls.post = Post.objects.create(title='Test Post', content='Test Content', author=cls.user)
+        Comment.objects.create(post=cls.post, author=cls.user, content='Comment')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        patcher = mock.patch('blog.signals.update_trending_score.delay')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def login_as_user(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_validators_are_sent(self):
+        for url in [reverse('post-list'), reverse('post-detail', args=[self.post.pk]),
+                    reverse('post-comments-list', args=[self.post.pk])]:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            self.assertTrue(response['ETag'].startswith('"'))
+        # У постов счётчики меняются без updated_at, поэтому Last-Modified только у комментариев
+        self.assertNotIn('Last-Modified', self.client.get(reverse('post-list')))
+        self.assertNotIn('Last-Modified', self.client.get(reverse('post-detail', args=[self.post.pk])))
+        self.assertIn('Last-Modified', self.client.get(reverse('post-comments-list', args=[self.post.pk])))
+
+    def test_if_none_match_returns_304_without_serialization(self):
+        url = reverse('post-detail', args=[self.post.pk])
+        self.login_as_user(self.other_user)
+        etag = self.client.get(url)['ETag']
+        # только валидаторы: пользователь из JWT уже в кэше, сам пост не запрашивается
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_anonymous_304_is_served_from_cache(self):
+        url = reverse('post-list')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_if_modified_since(self):
+        url = reverse('post-comments-list', args=[self.post.pk])
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_etag_changes_with_counters_and_viewer(self):
+        detail = reverse('post-detail', args=[self.post.pk])
+        listing = reverse('post-list')
+        self.login_as_user(self.other_user)
+        detail_etag = self.client.get(detail)['ETag']
+        list_etag = self.client.get(listing)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(user=self.other_user, post=self.post)
+            Post.objects.filter(pk=self.post.pk).update(likes_count=1)
+        response = self.client.get(detail, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.data['is_liked'])
+        self.assertEqual(self.client.get(listing, HTTP_IF_NONE_MATCH=list_etag).status_code, HTTPStatus.OK)
+
+        # Другой пользователь видит другой is_liked, поэтому и ETag у него свой
+        etag = self.client.get(detail)['ETag']
+        self.login_as_user(self.user)
+        self.assertEqual(self.client.get(detail, HTTP_IF_NONE_MATCH=etag).status_code, HTTPStatus.OK)
+
+    def test_new_comment_changes_comment_list_etag(self):
+        url = reverse('post-comments-list', args=[self.post.pk])
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, author=self.user, content='Another')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, HTTPStatus.OK)
+
+    def test_missing_post_is_404(self):
+        response = self.client.get(reverse('post-detail', args=[999]))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertNotIn('ETag', response)
+
+    def test_list_304_skips_the_page(self):
+        # Валидаторы списка - версии в кэше: ни страница, ни теги её постов не читаются
+        self.login_as_user(self.other_user)
+        url = reverse('post-list')
+        etag = self.client.get(url, {'cursor': ''})['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'cursor': ''}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+        url = reverse('post-comments-list', args=[self.post.pk])
+        etag = self.client.get(url, {'cursor': ''})['ETag']
+        # Только агрегат по комментариям поста
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'cursor': ''}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_new_reply_changes_comment_list_last_modified(self):
+        self.login_as_user(self.other_user)
+        url = reverse('post-comments-list', args=[self.post.pk])
+        last_modified = self.client.get(url)['Last-Modified']
+        root = Comment.objects.get(post=self.post)
+        with self.captureOnCommitCallbacks(execute=True):
+            reply = Comment.objects.create(post=self.post, author=self.user, content='Reply', parent=root)
+        # Корни страницы те же, но ответ новее их
+        Comment.objects.filter(pk=reply.pk).update(created_at=root.created_at + timedelta(seconds=5))
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['Last-Modified'], http_date((root.created_at + timedelta(seconds=5)).timestamp()))
+
+    def test_like_is_not_hidden_by_if_modified_since(self):
+        self.login_as_user(self.other_user)
+        url = reverse('post-detail', args=[self.post.pk])
+        self.client.get(url)
+        date = http_date(self.post.updated_at.timestamp() + 5)
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(user=self.other_user, post=self.post)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=date).status_code, HTTPStatus.OK)
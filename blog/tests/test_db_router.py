@@ -0,0 +1,51 @@
+from unittest import mock
+from django.db import OperationalError, router
+from django.test import RequestFactory, TestCase
+from django.contrib.auth import get_user_model
+from blog.checks import check_replica_schema
+from blog.models import Post
+from blog_project.db_router import ReadYourWritesMiddleware
+
+User = get_user_model()
+
+
+@mock.patch('blog_project.db_router.replica_configured', return_value=True)
+class DatabaseRouterTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='testuser@localhost.ru', password='testpass')
+
+    def route(self, method, view):
+        seen = []
+        middleware = ReadYourWritesMiddleware(lambda request: view(seen))
+        middleware(getattr(RequestFactory(), method)('/api/posts/'))
+        return seen
+
+    def test_safe_requests_read_from_replica(self, configured):
+        seen = self.route('get', lambda seen: seen.append(router.db_for_read(Post)))
+        self.assertEqual(seen, ['replica'])
+
+    def test_reads_after_write_stay_on_primary(self, configured):
+        def view(seen):
+            seen.append(router.db_for_read(Post))
+            Post.objects.create(title='Post', content='Content', author=self.user)
+            seen.append(router.db_for_read(Post))
+        self.assertEqual(self.route('get', view), ['replica', 'default'])
+
+    def test_unsafe_requests_use_primary(self, configured):
+        self.assertEqual(self.route('post', lambda seen: seen.append(router.db_for_read(Post))), ['default'])
+
+    def test_outside_requests_primary_is_used(self, configured):
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_replica_without_schema_fails_check(self, configured):
+        replica = mock.Mock()
+        with mock.patch('blog.checks.connections', {'replica': replica}):
+            replica.introspection.table_names.return_value = []
+            self.assertEqual([error.id for error in check_replica_schema(None)], ['blog.E002'])
+            replica.introspection.table_names.side_effect = OperationalError('unable to open database file')
+            self.assertEqual([error.id for error in check_replica_schema(None)], ['blog.E002'])
+            replica.introspection.table_names.side_effect = None
+            replica.introspection.table_names.return_value = ['django_migrations', Post._meta.db_table]
+            self.assertEqual(check_replica_schema(None), [])
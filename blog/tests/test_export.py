@@ -0,0 +1,87 @@
+import json
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from blog.models import Post, Comment, Like, Tag
+
+User = get_user_model()
+
+
+class ExportTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', email='admin@localhost.ru', password='testpass', is_staff=True)
+        cls.user = User.objects.create_user(username='testuser', email='testuser@localhost.ru', password='testpass')
+        cls.old_post = Post.objects.create(title='Old', content='Old content', author=cls.user)
+        cls.post = Post.objects.create(title='Новый', content='Content', author=cls.user)
+        cls.post.tags.add(Tag.objects.create(name='python'))
+        cls.root = Comment.objects.create(post=cls.post, author=cls.user, content='root')
+        cls.reply = Comment.objects.create(post=cls.post, author=cls.admin, content='reply', parent=cls.root)
+        Like.objects.create(user=cls.admin, post=cls.post)
+        Post.objects.filter(pk=cls.old_post.pk).update(updated_at=timezone.now() - timedelta(days=2))
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login_as_user(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def export(self, **params):
+        self.login_as_user(self.admin)
+        response = self.client.get(reverse('export'), params)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        body = b''.join(response.streaming_content).decode('utf-8')
+        return [json.loads(line) for line in body.splitlines()]
+
+    def test_full_export(self):
+        records = self.export()
+        self.assertEqual([r['type'] for r in records],
+                         ['post', 'post', 'comment', 'comment', 'like', 'watermark'])
+        post = records[1]
+        self.assertEqual((post['id'], post['title'], post['tags']), (self.post.pk, 'Новый', ['python']))
+        self.assertEqual([r['parent_id'] for r in records[2:4]], [None, self.root.pk])
+        self.assertEqual(records[4]['user_id'], self.admin.pk)
+
+    def test_incremental_export(self):
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        records = self.export(types='posts', updated_since=since)
+        self.assertEqual([r['id'] for r in records if r['type'] == 'post'], [self.post.pk])
+
+        watermark = records[-1]['updated_since']
+        self.post.title = 'Changed'
+        self.post.save()
+        records = self.export(types='posts,likes', updated_since=watermark)
+        self.assertEqual([(r['type'], r.get('title')) for r in records[:-1]], [('post', 'Changed')])
+
+    def test_query_count_does_not_depend_on_rows(self):
+        self.login_as_user(self.admin)
+        response = self.client.get(reverse('export'), {'types': 'posts'})
+        # посты с авторами + теги одного куска
+        with self.assertNumQueries(2):
+            list(response.streaming_content)
+
+    def test_validation_and_permissions(self):
+        self.login_as_user(self.admin)
+        self.assertEqual(self.client.get(reverse('export'), {'types': 'users'}).status_code, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(self.client.get(reverse('export'), {'updated_since': 'yesterday'}).status_code,
+                         HTTPStatus.BAD_REQUEST)
+        self.login_as_user(self.user)
+        self.assertEqual(self.client.get(reverse('export')).status_code, HTTPStatus.FORBIDDEN)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('export_blog_data', '--types', 'comments', stdout=out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([r['id'] for r in records[:-1]], [self.root.pk, self.reply.pk])
@@ -0,0 +1,97 @@
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from blog import facets
+from blog.models import Post, Tag
+
+User = get_user_model()
+
+
+class FacetsTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='testuser@localhost.ru', password='testpass')
+        cls.python = Tag.objects.create(name='python')
+        cls.django = Tag.objects.create(name='django')
+        cls.first = Post.objects.create(title='Python tips', content='python', author=cls.user, category='PROGRAMMING')
+        cls.second = Post.objects.create(title='Django tips', content='django', author=cls.user, category='PROGRAMMING')
+        cls.third = Post.objects.create(title='Road trip', content='cars', author=cls.user, category='TRAVEL')
+        cls.first.tags.add(cls.python, cls.django)
+        cls.second.tags.add(cls.django)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        patcher = mock.patch('blog.signals.update_trending_score.delay')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def facets(self, **params):
+        response = self.client.get(reverse('post-list'), {'facets': '1', **params})
+        return response.data['facets']
+
+    def assert_facets(self, categories, tags, **params):
+        data = self.facets(**params)
+        self.assertEqual({k: v for k, v in data['category'].items() if v}, categories)
+        self.assertEqual([(t['name'], t['count']) for t in data['tags']], tags)
+
+    def test_facets_are_optional(self):
+        self.assertNotIn('facets', self.client.get(reverse('post-list')).data)
+
+    def test_unfiltered_facets(self):
+        self.assert_facets({'PROGRAMMING': 2, 'TRAVEL': 1}, [('django', 2), ('python', 1)])
+
+    def test_facets_follow_filters_and_search(self):
+        self.assert_facets({'TRAVEL': 1}, [], category='TRAVEL')
+        self.assert_facets({'PROGRAMMING': 1}, [('django', 1), ('python', 1)], search='python')
+
+    def test_filtered_facets_use_two_grouped_queries(self):
+        # count + посты + теги постов + 2 запроса фасетов
+        with self.assertNumQueries(5):
+            self.facets(category='PROGRAMMING')
+
+    def test_cached_facets_updated_incrementally(self):
+        self.facets()
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(title='New', content='new', author=self.user, category='TRAVEL')
+            post.tags.add(self.python)
+            self.second.tags.set([self.python])
+            self.first.category = 'TRAVEL'
+            self.first.save()
+            self.third.delete()
+        with self.assertNumQueries(3):
+            self.assert_facets({'PROGRAMMING': 1, 'TRAVEL': 2}, [('python', 3), ('django', 1)])
+
+    def test_rolled_back_writes_leave_counts(self):
+        self.facets()
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                post = Post.objects.create(title='New', content='new', author=self.user, category='TRAVEL')
+                post.tags.add(self.python)
+                self.second.delete()
+                raise RuntimeError
+        self.assert_facets({'PROGRAMMING': 2, 'TRAVEL': 1}, [('django', 2), ('python', 1)])
+
+    def test_tag_changes_use_ids_and_incr(self):
+        self.facets()
+        with CaptureQueriesContext(connection) as captured, mock.patch.object(cache, 'set') as cache_set:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.third.tags.add(self.python)
+        # Имена тегов не нужны, а счётчики меняются incr без перезаписи
+        self.assertFalse([query for query in captured if 'FROM "blog_tag"' in query['sql']])
+        self.assertFalse([call for call in cache_set.call_args_list if call.args[0].startswith('facets:')])
+        self.assert_facets({'PROGRAMMING': 2, 'TRAVEL': 1}, [('django', 2), ('python', 2)])
+
+    def test_new_tag_resets_cached_counts(self):
+        self.facets()
+        rust = Tag.objects.create(name='rust')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.third.tags.add(rust)
+        self.assertIsNone(cache.get(facets.FACETS_KEY))
+        self.assert_facets({'PROGRAMMING': 2, 'TRAVEL': 1}, [('django', 2), ('python', 1), ('rust', 1)])
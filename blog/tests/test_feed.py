@@ -0,0 +1,165 @@
+from datetime import timedelta
+from http import HTTPStatus
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from blog import timeline
+from blog.checks import check_timeline_store
+from blog.models import Post, Tag, AuthorSubscription, TagSubscription
+from blog.tasks import fan_out_post, backfill_timeline
+
+User = get_user_model()
+
+
+@mock.patch('blog.signals.update_trending_score.delay')
+@mock.patch('blog.views.backfill_timeline.delay', side_effect=backfill_timeline)
+@mock.patch('blog.views.fan_out_post.delay', side_effect=fan_out_post)
+class FeedTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader', email='reader@localhost.ru', password='testpass')
+        cls.author = User.objects.create_user(username='author', email='author@localhost.ru', password='testpass')
+        cls.other = User.objects.create_user(username='other', email='other@localhost.ru', password='testpass')
+        cls.python = Tag.objects.create(name='python')
+
+    def setUp(self):
+        cache.clear()
+        timeline.get_store().clear()
+        self.client = APIClient()
+
+    def login_as_user(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def publish(self, user, title, tags=()):
+        self.login_as_user(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('post-list'), {
+                'title': title, 'content': 'Content', 'category': 'OTHER', 'tags': list(tags),
+            }, format='json')
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        return response.data['id']
+
+    def subscribe(self, user, url_name, data):
+        self.login_as_user(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse(url_name), data)
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        return response.data['id']
+
+    def feed(self, user, **params):
+        self.login_as_user(user)
+        response = self.client.get(reverse('feed'), params)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response.data
+
+    def feed_ids(self, user):
+        return [post['id'] for post in self.feed(user)['results']]
+
+    def test_feed_contains_followed_authors_and_tags(self, *mocks):
+        self.subscribe(self.reader, 'author-subscription-list', {'author': 'author'})
+        self.subscribe(self.reader, 'tag-subscription-list', {'tag': 'Python'})
+        by_author = self.publish(self.author, 'By author')
+        by_tag = self.publish(self.other, 'By tag', tags=['python'])
+        self.publish(self.other, 'Unrelated', tags=['cooking'])
+        self.assertEqual(self.feed_ids(self.reader), [by_tag, by_author])
+        self.assertEqual(self.feed_ids(self.author), [])
+
+    def test_subscription_backfills_recent_posts(self, *mocks):
+        old = self.publish(self.author, 'Old post')
+        self.subscribe(self.reader, 'author-subscription-list', {'author': 'author'})
+        self.assertEqual(self.feed_ids(self.reader), [old])
+
+    def test_unsubscribe_hides_posts(self, *mocks):
+        subscription = self.subscribe(self.reader, 'author-subscription-list', {'author': 'author'})
+        self.publish(self.author, 'Post')
+        self.login_as_user(self.reader)
+        response = self.client.delete(reverse('author-subscription-detail', args=[subscription]))
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        self.assertEqual(self.feed_ids(self.reader), [])
+
+    def test_cannot_follow_self_or_twice(self, *mocks):
+        self.login_as_user(self.reader)
+        response = self.client.post(reverse('author-subscription-list'), {'author': 'reader'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.subscribe(self.reader, 'tag-subscription-list', {'tag': 'python'})
+        response = self.client.post(reverse('tag-subscription-list'), {'tag': 'python'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    @override_settings(FEED_FANOUT_THRESHOLD=2)
+    def test_popular_author_is_merged_on_read(self, *mocks):
+        AuthorSubscription.objects.create(subscriber=self.reader, author=self.author)
+        AuthorSubscription.objects.create(subscriber=self.other, author=self.author)
+        TagSubscription.objects.create(subscriber=self.reader, tag=self.python)
+        popular = self.publish(self.author, 'Popular author')
+        regular = self.publish(self.other, 'Regular', tags=['python'])
+        # Пост популярного автора в ленты не раскладывается
+        self.assertEqual(timeline.get_store().range(self.reader.pk), [(regular, mock.ANY)])
+        self.assertEqual(self.feed_ids(self.reader), [regular, popular])
+
+    def read_all_pages(self, user):
+        seen = []
+        params = {}
+        while True:
+            data = self.feed(user, **params)
+            seen.extend(post['id'] for post in data['results'])
+            if data['next'] is None:
+                return seen
+            params = {'before': parse_qs(urlsplit(data['next']).query)['before'][0]}
+
+    @override_settings(FEED_PAGE_SIZE=2)
+    def test_pagination_by_cursor(self, *mocks):
+        AuthorSubscription.objects.create(subscriber=self.reader, author=self.author)
+        now = timezone.now()
+        posts = []
+        for minutes in range(5):
+            post = Post.objects.create(title=f'Post {minutes}', content='Content', author=self.author)
+            Post.objects.filter(pk=post.pk).update(created_at=now - timedelta(minutes=minutes))
+            posts.append(post.pk)
+        backfill_timeline(self.reader.pk, author_id=self.author.pk)
+        self.assertEqual(self.read_all_pages(self.reader), posts)
+
+    @override_settings(FEED_PAGE_SIZE=2, FEED_FANOUT_THRESHOLD=2)
+    def test_same_time_posts_across_page_boundary(self, *mocks):
+        # Разложенные и подмешанные при чтении посты с одним и тем же временем
+        AuthorSubscription.objects.create(subscriber=self.reader, author=self.author)
+        AuthorSubscription.objects.create(subscriber=self.reader, author=self.other)
+        AuthorSubscription.objects.create(subscriber=self.author, author=self.other)
+        now = timezone.now()
+        posts = [Post.objects.create(title=f'Post {i}', content='Content', author=author)
+                 for i, author in enumerate([self.author, self.other] * 3)]
+        Post.objects.update(created_at=now)
+        backfill_timeline(self.reader.pk, author_id=self.author.pk)
+        self.assertEqual(self.read_all_pages(self.reader), sorted((post.pk for post in posts), reverse=True))
+
+    def test_bad_cursor(self, *mocks):
+        self.login_as_user(self.reader)
+        response = self.client.get(reverse('feed'), {'before': '1700000000.5'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_worker_fan_out_requires_redis(self, *mocks):
+        with override_settings(TIMELINE_REDIS_URL=None, CELERY_BROKER_URL='redis://localhost:6379/0'), \
+                mock.patch('blog.timeline._store', None):
+            self.assertEqual([error.id for error in check_timeline_store(None)], ['blog.E001'])
+            with self.assertRaises(ImproperlyConfigured):
+                timeline.get_store()
+            with override_settings(CELERY_TASK_ALWAYS_EAGER=True):
+                self.assertEqual(check_timeline_store(None), [])
+                self.assertIsInstance(timeline.get_store(), timeline.LocalTimelineStore)
+
+    def test_timeline_is_capped(self, *mocks):
+        store = timeline.LocalTimelineStore(3)
+        store.add([self.reader.pk], {pk: float(pk) for pk in range(1, 6)})
+        self.assertEqual([pk for pk, _ in store.range(self.reader.pk)], [5, 4, 3])
+
+    def test_feed_requires_authentication(self, *mocks):
+        response = self.client.get(reverse('feed'))
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
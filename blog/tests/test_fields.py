@@ -0,0 +1,74 @@
+from http import HTTPStatus
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from blog.models import Post, Tag, EXCERPT_LENGTH
+
+User = get_user_model()
+
+
+class SparseFieldsTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='testuser@localhost.ru', password='testpass')
+        cls.post = Post.objects.create(title='Long', content='word\n  ' * 200, author=cls.user)
+        cls.post.tags.add(Tag.objects.create(name='python'))
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_excerpt_is_stored_on_save(self):
+        self.assertEqual(len(self.post.excerpt), EXCERPT_LENGTH)
+        self.assertTrue(self.post.excerpt.startswith('word word'))
+        self.post.content = 'Short text'
+        self.post.save(update_fields=['content'])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.excerpt, 'Short text')
+
+    def test_list_returns_excerpt_instead_of_content(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('post-list'))
+        result = response.data['results'][0]
+        self.assertNotIn('content', result)
+        self.assertEqual(result['excerpt'], self.post.excerpt)
+        self.assertEqual(result['tags'], ['python'])
+        self.assertFalse(any('"blog_post"."content"' in query['sql'] for query in captured))
+
+    def test_detail_returns_full_content(self):
+        response = self.client.get(reverse('post-detail', args=[self.post.pk]))
+        self.assertEqual(response.data['content'], self.post.content)
+
+    def test_sparse_fields(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('post-list'), {'fields': 'id,title'})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.data['results'], [{'id': self.post.pk, 'title': 'Long'}])
+        # Без тегов нет и запроса за тегами, без автора - JOIN с пользователями
+        sql = ' '.join(query['sql'] for query in captured)
+        self.assertNotIn('blog_post_tags', sql)
+        self.assertNotIn('users_customuser', sql)
+        self.assertNotIn('"blog_post"."excerpt"', sql)
+
+        response = self.client.get(reverse('post-detail', args=[self.post.pk]), {'fields': 'content'})
+        self.assertEqual(response.data, {'content': self.post.content})
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(reverse('post-list'), {'fields': 'id,password'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('password', response.data['fields'])
+
+    def test_rebuild_excerpts_command(self):
+        Post.objects.filter(pk=self.post.pk).update(excerpt='')
+        out = StringIO()
+        call_command('rebuild_post_excerpts', stdout=out)
+        self.assertIn('1', out.getvalue())
+        self.post.refresh_from_db()
+        self.assertEqual(len(self.post.excerpt), EXCERPT_LENGTH)
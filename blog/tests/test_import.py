@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from blog import export
+from blog.models import Post, Comment, Like
+from blog.seed import seed_dataset
+
+
+class ImportTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_dataset(users=5, posts=20, tags=8, comments=120, likes=60, notifications=0, seed=3)
+
+    def setUp(self):
+        cache.clear()
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.path = os.path.join(self.dir.name, 'blog.ndjson')
+        with open(self.path, 'w', encoding='utf-8') as output:
+            output.writelines(export.export_lines())
+        self.posts = {p.pk: (p.title, p.created_at, p.updated_at, p.likes_count, p.comments_count, sorted(t.name for t in p.tags.all()))
+                      for p in Post.objects.prefetch_related('tags')}
+        self.comments = {c.pk: (c.parent_id, c.level, c.rght - c.lft, c.created_at) for c in Comment.objects.all()}
+        self.likes = set(Like.objects.values_list('pk', 'user_id', 'post_id'))
+        Post.objects.all().delete()
+
+    def import_data(self, *args):
+        out = StringIO()
+        call_command('import_blog_data', self.path, *args, stdout=out)
+        return out.getvalue()
+
+    def assert_restored(self):
+        posts = {p.pk: (p.title, p.created_at, p.updated_at, p.likes_count, p.comments_count, sorted(t.name for t in p.tags.all()))
+                 for p in Post.objects.prefetch_related('tags')}
+        self.assertEqual(posts, self.posts)
+        comments = {c.pk: (c.parent_id, c.level, c.rght - c.lft, c.created_at) for c in Comment.objects.all()}
+        self.assertEqual(comments, self.comments)
+        self.assertEqual(set(Like.objects.values_list('pk', 'user_id', 'post_id')), self.likes)
+
+    def test_import_restores_export(self):
+        output = self.import_data('--chunk-size', '50')
+        self.assertIn('records/s', output)
+        self.assert_restored()
+        # Деревья корректны для MPTT: потомки находятся по lft/rght
+        root = Comment.objects.filter(level=0, rght__gt=2).first()
+        self.assertEqual(root.get_descendants().count(), (root.rght - root.lft - 1) // 2)
+        self.assertFalse(os.path.exists(f'{self.path}.checkpoint'))
+
+    def test_resume_from_checkpoint(self):
+        with open(self.path, encoding='utf-8') as source:
+            lines = source.readlines()
+        # Первый прогон упал после 40 строк: они уже закоммичены, точка записана
+        with open(self.path, 'w', encoding='utf-8') as partial:
+            partial.writelines(lines[:40])
+        self.import_data('--chunk-size', '20')
+        with open(self.path, 'w', encoding='utf-8') as full:
+            full.writelines(lines)
+        with open(f'{self.path}.checkpoint', 'w', encoding='utf-8') as checkpoint:
+            json.dump({'line': 40}, checkpoint)
+
+        self.import_data('--chunk-size', '20', '--resume')
+        self.assert_restored()
+
+    def test_records_with_missing_references_are_skipped(self):
+        with open(self.path, 'a', encoding='utf-8') as output:
+            output.write(json.dumps({'type': 'like', 'id': 10 ** 6, 'user_id': 10 ** 6, 'post_id': 1}) + '\n')
+            output.write(json.dumps({'type': 'comment', 'id': 10 ** 6, 'post_id': 10 ** 6, 'author_id': 1,
+                                     'parent_id': None, 'content': 'orphan'}) + '\n')
+        self.assertIn('пропущено 2', self.import_data())
+        self.assert_restored()
+
+    def test_existing_ids_are_left_untouched(self):
+        self.import_data()
+        post = Post.objects.filter(tags__isnull=False).first()
+        Post.objects.filter(pk=post.pk).update(title='Edited', created_at=post.created_at.replace(year=2000))
+        post.tags.clear()
+
+        output = self.import_data()
+        total = len(self.posts) + len(self.comments) + len(self.likes)
+        self.assertIn(f'постов 0, комментариев 0, лайков 0, пропущено 0, уже были в базе {total}', output)
+        post.refresh_from_db()
+        self.assertEqual((post.title, post.created_at.year), ('Edited', 2000))
+        self.assertFalse(post.tags.exists())
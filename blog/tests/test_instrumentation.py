@@ -0,0 +1,50 @@
+from http import HTTPStatus
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from blog.models import Post
+from blog_project.instrumentation import reset_route_stats
+
+User = get_user_model()
+
+
+class InstrumentationTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', email='admin@localhost.ru', password='testpass', is_staff=True)
+        cls.post = Post.objects.create(title='Test Post', content='Test Content', author=cls.admin)
+
+    def setUp(self):
+        cache.clear()
+        reset_route_stats()
+        self.client = APIClient()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('post-list'))
+        header = response['Server-Timing']
+        self.assertIn('db;dur=', header)
+        self.assertIn('desc="3 queries"', header)
+        self.assertIn('serializer;dur=', header)
+        self.assertIn('total;dur=', header)
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_slow_request_is_logged_with_sql(self):
+        with self.assertLogs('blog_project.instrumentation', level='WARNING') as logs:
+            self.client.get(reverse('post-detail', args=[self.post.pk]))
+        self.assertIn('Slow request GET', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+    def test_route_stats_endpoint(self):
+        self.client.get(reverse('post-list'))
+        self.client.get(reverse('post-list'))
+        self.assertEqual(self.client.get(reverse('route-stats')).status_code, HTTPStatus.UNAUTHORIZED)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin).access_token}')
+        response = self.client.get(reverse('route-stats'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        stats = response.data['GET post-list']
+        self.assertEqual(stats['count'], 2)
+        self.assertEqual(sum(stats['buckets'].values()), 2)
@@ -0,0 +1,126 @@
+from http import HTTPStatus
+from io import StringIO
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from blog.models import Post, Like
+
+User = get_user_model()
+
+
+class LikesCountTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='testuser@localhost.ru', password='testpass')
+        cls.other_user = User.objects.create_user(username='otheruser', email='otheruser@localhost.ru', password='testpass')
+        cls.post = Post.objects.create(title='Test Post', content='Test Content', author=cls.user)
+        cls.popular_post = Post.objects.create(title='Popular Post', content='Content', author=cls.user, likes_count=5)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login_as_user(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_like_increments_counter(self):
+        self.login_as_user(self.other_user)
+        response = self.client.post(reverse('post-likes-list', args=[self.post.pk]))
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+
+    def test_repeated_like_does_not_increment_counter(self):
+        self.login_as_user(self.other_user)
+        self.client.post(reverse('post-likes-list', args=[self.post.pk]))
+        response = self.client.post(reverse('post-likes-list', args=[self.post.pk]))
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+
+    def test_remove_like_decrements_counter(self):
+        self.login_as_user(self.other_user)
+        self.client.post(reverse('post-likes-list', args=[self.post.pk]))
+        response = self.client.delete(reverse('post-likes-delete-like', args=[self.post.pk]))
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+    def test_order_by_likes_count(self):
+        response = self.client.get(reverse('post-list'), {'ordering': '-likes_count'})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.data['results'][0]['id'], self.popular_post.pk)
+        self.assertEqual(response.data['results'][0]['likes_count'], 5)
+
+    def test_recount_command(self):
+        Like.objects.create(post=self.post, user=self.other_user)
+        out = StringIO()
+        call_command('recount_post_counters', '--check', stdout=out)
+        self.assertIn(f'Post {self.post.pk}', out.getvalue())
+        self.assertIn(f'Post {self.popular_post.pk}', out.getvalue())
+
+        call_command('recount_post_counters', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.popular_post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.popular_post.likes_count, 0)
+
+
+class IsLikedTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='testuser@localhost.ru', password='testpass')
+        cls.other_user = User.objects.create_user(username='otheruser', email='otheruser@localhost.ru', password='testpass')
+        cls.liked = Post.objects.create(title='Liked', content='Content', author=cls.user)
+        cls.not_liked = Post.objects.create(title='Not liked', content='Content', author=cls.user)
+        Like.objects.create(post=cls.liked, user=cls.other_user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login_as_user(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_list_and_detail_flag(self):
+        self.login_as_user(self.other_user)
+        # пользователь из JWT + count + посты с is_liked + теги
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('post-list'))
+        flags = {post['id']: post['is_liked'] for post in response.data['results']}
+        self.assertEqual(flags, {self.liked.pk: True, self.not_liked.pk: False})
+        response = self.client.get(reverse('post-detail', args=[self.liked.pk]))
+        self.assertTrue(response.data['is_liked'])
+
+    def test_flag_is_per_viewer(self):
+        self.login_as_user(self.user)
+        response = self.client.get(reverse('post-detail', args=[self.liked.pk]))
+        self.assertFalse(response.data['is_liked'])
+        self.client.credentials()
+        response = self.client.get(reverse('post-detail', args=[self.liked.pk]))
+        self.assertFalse(response.data['is_liked'])
+
+    def test_batch_endpoint(self):
+        self.login_as_user(self.other_user)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('post-liked'), {'ids': f'{self.liked.pk},{self.not_liked.pk},999'})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.data, {str(self.liked.pk): True, str(self.not_liked.pk): False, '999': False})
+
+    def test_batch_endpoint_validation(self):
+        self.login_as_user(self.other_user)
+        response = self.client.get(reverse('post-liked'), {'ids': '1,abc'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        response = self.client.get(reverse('post-liked'), {'ids': ','.join(map(str, range(101)))})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.client.credentials()
+        response = self.client.get(reverse('post-liked'), {'ids': '1'})
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
@@ -0,0 +1,71 @@
+from http import HTTPStatus
+from datetime import timedelta
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from blog.models import Post, Like
+
+User = get_user_model()
+
+
+class KeysetPaginationTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='testuser@localhost.ru', password='testpass')
+        posts = [Post.objects.create(title=f'Post {i}', content='Content', author=cls.user) for i in range(25)]
+        # Часть постов с одинаковой датой, чтобы проверить тай-брейкер по id
+        now = timezone.now()
+        for i, post in enumerate(posts):
+            Post.objects.filter(pk=post.pk).update(created_at=now - timedelta(minutes=i // 3))
+        for i in range(12):
+            user = User.objects.create(username=f'liker{i}', email=f'liker{i}@localhost.ru')
+            Like.objects.create(user=user, post=posts[0])
+        cls.first_post = posts[0]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def walk(self, url, params, link='next'):
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            pages.append([item.get('id', item.get('user')) for item in response.data['results']])
+            if not response.data[link]:
+                return pages, response
+            response = self.client.get(response.data[link])
+
+    def test_page_number_pagination_is_default(self):
+        response = self.client.get(reverse('post-list'))
+        self.assertIn('count', response.data)
+
+    def test_cursor_walks_all_posts_in_order(self):
+        expected = list(Post.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        pages, _ = self.walk(reverse('post-list'), {'cursor': ''})
+        self.assertNotIn('count', self.client.get(reverse('post-list'), {'cursor': ''}).data)
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_cursor_respects_ordering_param(self):
+        expected = list(Post.objects.order_by('created_at', 'id').values_list('id', flat=True))
+        pages, _ = self.walk(reverse('post-list'), {'cursor': '', 'ordering': 'created_at'})
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_previous_links_walk_back(self):
+        forward, last = self.walk(reverse('post-list'), {'cursor': ''})
+        backward, _ = self.walk(last.data['previous'], {}, link='previous')
+        self.assertEqual(backward, forward[-2::-1])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('post-list'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_likes_cursor(self):
+        url = reverse('post-likes-list', args=[self.first_post.pk])
+        pages, _ = self.walk(url, {'cursor': ''})
+        self.assertEqual([len(page) for page in pages], [10, 2])
@@ -0,0 +1,96 @@
+from io import StringIO
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.urls import URLResolver, get_resolver, resolve, reverse
+from django.db.models import Count
+from blog.management.commands.benchmark import UNMEASURED_ROUTES, Command as BenchmarkCommand
+from blog.models import Post
+from blog.seed import seed_dataset
+from notifications.models import Notification
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    Число запросов на страницу не должно зависеть от объёма данных.
+    Если тест упал - скорее всего, в сериализатор вернулся N+1.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = data = seed_dataset(users=10, posts=40, tags=15, comments=200, likes=150, notifications=60, seed=1)
+        cls.user = data['users'][0]
+        cls.post = Post.objects.annotate(n=Count('comment')).order_by('-n').first()
+        Notification.objects.bulk_create([Notification(user=cls.user, message=f'n{i}') for i in range(15)])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def test_post_list_anonymous(self):
+        # count + посты с авторами + теги
+        with self.assertNumQueries(3):
+            self.client.get(reverse('post-list'))
+
+    def test_post_list_authenticated(self):
+        self.login()
+        # + пользователь из JWT
+        with self.assertNumQueries(4):
+            self.client.get(reverse('post-list'))
+
+    def test_post_list_cursor(self):
+        with self.assertNumQueries(2):
+            self.client.get(reverse('post-list'), {'cursor': ''})
+
+    def test_post_search(self):
+        with self.assertNumQueries(3):
+            self.client.get(reverse('post-list'), {'search': 'python'})
+
+    def test_post_detail(self):
+        with self.assertNumQueries(3):
+            self.client.get(reverse('post-detail', args=[self.post.pk]))
+
+    def test_comment_list(self):
+        # агрегат для валидаторов + count + страница корней + их деревья
+        with self.assertNumQueries(4):
+            self.client.get(reverse('post-comments-list', args=[self.post.pk]))
+
+    def test_like_list(self):
+        with self.assertNumQueries(2):
+            self.client.get(reverse('post-likes-list', args=[self.post.pk]))
+
+    def test_notification_list(self):
+        self.login()
+        with self.assertNumQueries(3):
+            self.client.get(reverse('notification-list'))
+
+    def test_benchmark_covers_every_route(self):
+        command = BenchmarkCommand()
+        command.prepare(self.data)
+        measured = {resolve(make_request()[0].partition('?')[0]).url_name for _, _, make_request in command.routes()}
+        self.assertEqual(api_route_names() - measured - set(UNMEASURED_ROUTES), set())
+
+    @override_settings(ALLOWED_HOSTS=['localhost'])
+    def test_benchmark_measures_successful_responses(self):
+        # 11 итераций создания, правки и удаления постов - больше лимита posts (30/hour)
+        out = StringIO()
+        call_command('benchmark', users=5, posts=20, tags=5, comments=30, likes=30, notifications=5,
+                     iterations=11, stdout=out)
+        self.assertIn('post-delete', out.getvalue())
+        self.assertNotIn(' 429 ', out.getvalue())
+
+
+def api_route_names(patterns=None, prefix=''):
+    """Имена маршрутов blog, notifications и JWT - то, что должен замерять benchmark."""
+    names = set()
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            names |= api_route_names(pattern.url_patterns, prefix + str(pattern.pattern))
+        elif pattern.name and (prefix.startswith(('blog/', 'notifications/')) or pattern.name.startswith('jwt-')):
+            names.add(pattern.name)
+    return names
@@ -0,0 +1,101 @@
+from http import HTTPStatus
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from blog.models import Post, Comment, Like, Tag
+
+User = get_user_model()
+
+
+class ResponseCacheTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='testuser@localhost.ru', password='testpass')
+        cls.admin = User.objects.create_user(username='admin', email='admin@localhost.ru', password='testpass', is_staff=True)
+        cls.post = Post.objects.create(title='Test Post', content='Test Content', author=cls.user)
+        cls.other_post = Post.objects.create(title='Other Post', content='Other Content', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        patcher = mock.patch('blog.signals.update_trending_score.delay')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_anonymous_list_is_served_from_cache(self):
+        url = reverse('post-list')
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(first.data, second.data)
+
+    def test_query_params_are_part_of_key(self):
+        self.client.get(reverse('post-list'))
+        with self.assertNumQueries(3):
+            self.client.get(reverse('post-list'), {'ordering': 'created_at'})
+
+    def test_like_invalidates_list_and_detail(self):
+        list_url = reverse('post-list')
+        detail_url = reverse('post-detail', args=[self.post.pk])
+        self.client.get(list_url)
+        self.client.get(detail_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(user=self.user, post=self.post)
+            Post.objects.filter(pk=self.post.pk).update(likes_count=1)
+        self.assertEqual(self.client.get(detail_url).data['likes_count'], 1)
+        self.assertEqual(self.client.get(list_url).data['results'][1]['likes_count'], 1)
+
+    def test_versions_bump_after_commit(self):
+        url = reverse('post-detail', args=[self.post.pk])
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = 'Renamed'
+            self.post.save()
+            # Пока запись не закоммичена, читатели получают прежний ответ и не кэшируют новый
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get(url).data['title'], 'Test Post')
+        self.assertEqual(self.client.get(url).data['title'], 'Renamed')
+
+    def test_write_evicts_only_affected_detail(self):
+        self.client.get(reverse('post-detail', args=[self.other_post.pk]))
+        self.post.title = 'Renamed'
+        self.post.save()
+        with self.assertNumQueries(0):
+            self.client.get(reverse('post-detail', args=[self.other_post.pk]))
+
+    def test_retagging_invalidates_detail(self):
+        url = reverse('post-detail', args=[self.post.pk])
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.tags.add(Tag.objects.create(name='python'))
+        self.assertEqual(self.client.get(url).data['tags'], ['python'])
+
+    def test_new_comment_invalidates_comment_list(self):
+        url = reverse('post-comments-list', args=[self.post.pk])
+        self.assertEqual(self.client.get(url).data['count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, author=self.user, content='New Comment')
+        self.assertEqual(self.client.get(url).data['count'], 1)
+
+    def test_authenticated_requests_bypass_cache(self):
+        url = reverse('post-list')
+        self.client.get(url)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        with self.assertNumQueries(4):
+            self.client.get(url)
+
+    def test_stats_endpoint(self):
+        url = reverse('post-list')
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual(self.client.get(reverse('stats')).status_code, HTTPStatus.UNAUTHORIZED)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin).access_token}')
+        response = self.client.get(reverse('stats'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.data['response_cache.hit'], 1)
+        self.assertEqual(response.data['response_cache.miss'], 1)
@@ -1,4 +1,5 @@
 from http import HTTPStatus
+from django.core.cache import cache
 from django.test import TestCase
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -19,6 +20,7 @@ class RoutesTestCase(TestCase):
         cls.like = Like.objects.create(post=cls.post, user=cls.user)
 
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
 
     def login_as_user(self, user):
@@ -0,0 +1,75 @@
+from http import HTTPStatus
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from blog.models import Post
+from blog.search import SEARCH_TABLE
+
+User = get_user_model()
+
+
+class PostSearchTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='testuser@localhost.ru', password='testpass')
+        cls.python_post = Post.objects.create(
+            title='Python tips', content='Programming in python every day', author=cls.user, category='PROGRAMMING')
+        cls.mention_post = Post.objects.create(
+            title='Road trip', content='We listened to a podcast about python', author=cls.user, category='TRAVEL')
+        cls.cars_post = Post.objects.create(
+            title='Новые машины', content='Обзор электромобилей', author=cls.user, category='CARS')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def search(self, **params):
+        response = self.client.get(reverse('post-list'), params)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response.data['results']
+
+    def test_results_ranked_by_relevance(self):
+        results = self.search(search='python')
+        self.assertEqual([r['id'] for r in results], [self.python_post.pk, self.mention_post.pk])
+        self.assertIn('<mark>', results[0]['snippet'])
+
+    def test_snippet_escapes_post_content(self):
+        post = Post.objects.create(title='Markup', content='<img src=x onerror=alert(1)> & python', author=self.user)
+        snippet = next(r['snippet'] for r in self.search(search='onerror') if r['id'] == post.pk)
+        self.assertEqual(snippet, '&lt;img src=x <mark>onerror</mark>=alert(1)&gt; &amp; python')
+
+    def test_prefix_matching(self):
+        results = self.search(search='электро')
+        self.assertEqual([r['id'] for r in results], [self.cars_post.pk])
+
+    def test_search_with_category_filter(self):
+        results = self.search(search='python', category='TRAVEL')
+        self.assertEqual([r['id'] for r in results], [self.mention_post.pk])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.cars_post.content = 'Теперь про python'
+        self.cars_post.save()
+        self.assertIn(self.cars_post.pk, [r['id'] for r in self.search(search='python')])
+        self.python_post.delete()
+        self.assertNotIn(self.python_post.pk, [r['id'] for r in self.search(search='python')])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        self.assertEqual(self.search(search='python'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.search(search='python')), 2)
+
+    def test_rank_and_snippet_share_one_match(self):
+        # bm25 и snippet берутся из того же JOIN, а не из подзапроса на каждую строку
+        with CaptureQueriesContext(connection) as queries:
+            self.search(search='python', facets='1')
+        page_query = next(q['sql'] for q in queries if 'snippet(' in q['sql'])
+        self.assertEqual(page_query.count('MATCH'), 1)
@@ -0,0 +1,80 @@
+from http import HTTPStatus
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from blog.models import Post, Tag
+from blog.tags import TagCache, resolve_tag_ids, tag_cache
+
+User = get_user_model()
+
+
+class TagResolutionTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='testuser@localhost.ru', password='testpass')
+        cls.python = Tag.objects.create(name='python')
+
+    def setUp(self):
+        tag_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def create_post(self, tags):
+        return self.client.post(
+            reverse('post-list'),
+            {'title': 'New Post', 'content': 'New Content', 'category': 'OTHER', 'tags': tags},
+            format='json',
+        )
+
+    def test_names_are_normalized_and_deduplicated(self):
+        ids = resolve_tag_ids([' Python ', 'python', 'Django', ''])
+        self.assertEqual(ids[0], self.python.pk)
+        self.assertEqual(len(ids), 2)
+        self.assertTrue(Tag.objects.filter(name='django').exists())
+
+    def test_tag_queries_do_not_depend_on_tag_count(self):
+        # Пользователь из JWT кэшируется на первом запросе, дальше запросов за ним нет
+        self.client.get(reverse('post-list'))
+        with CaptureQueriesContext(connection) as few:
+            self.create_post(['a1', 'a2'])
+        with CaptureQueriesContext(connection) as many:
+            self.create_post([f'b{i}' for i in range(15)])
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(Post.objects.latest('id').tags.count(), 15)
+
+    def test_cached_tags_skip_lookups(self):
+        resolve_tag_ids(['python', 'django'])
+        with self.assertNumQueries(0):
+            resolve_tag_ids(['Python', 'django'])
+
+    def test_cache_invalidated_on_tag_write(self):
+        resolve_tag_ids(['python'])
+        self.python.delete()
+        resolve_tag_ids(['python'])
+        self.assertTrue(Tag.objects.filter(name='python').exists())
+
+    def test_cache_is_shared_between_workers(self):
+        resolve_tag_ids(['python'])
+        # Отдельный экземпляр - как кэш в другом процессе
+        other = TagCache()
+        self.assertEqual(other.get_many(['python'], other.version()), {'python': self.python.pk})
+        self.python.delete()
+        self.assertEqual(other.get_many(['python'], other.version()), {})
+
+    def test_update_replaces_tags(self):
+        post_id = self.create_post(['python', 'old']).data['id']
+        url = reverse('post-detail', args=[post_id])
+        response = self.client.patch(url, {'tags': ['Django', 'python']}, format='json')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(sorted(response.data['tags']), ['django', 'python'])
+
+    def test_update_without_tags_keeps_tags(self):
+        post_id = self.create_post(['python']).data['id']
+        url = reverse('post-detail', args=[post_id])
+        response = self.client.put(url, {'title': 'Updated', 'content': 'Updated', 'category': 'OTHER'}, format='json')
+        self.assertEqual(response.data['tags'], ['python'])
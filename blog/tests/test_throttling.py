@@ -0,0 +1,80 @@
+from http import HTTPStatus
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from blog import stats
+from blog.models import Post
+from blog.throttling import ActionRateThrottle
+
+User = get_user_model()
+
+
+@mock.patch.object(ActionRateThrottle, 'THROTTLE_RATES', {'comments': '2/min', 'likes': '1/min', 'posts': None})
+@mock.patch('blog.throttling.time.time', return_value=6000.0)
+class ThrottlingTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='testuser@localhost.ru', password='testpass')
+        cls.other_user = User.objects.create_user(username='otheruser', email='otheruser@localhost.ru', password='testpass')
+        cls.post = Post.objects.create(title='Test Post', content='Test Content', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login_as_user(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def comment(self):
+        return self.client.post(reverse('post-comments-list', args=[self.post.pk]), {'content': 'Comment'})
+
+    def test_writes_over_limit_get_429_with_retry_after(self, now):
+        self.login_as_user(self.user)
+        self.assertEqual(self.comment().status_code, HTTPStatus.CREATED)
+        self.assertEqual(self.comment().status_code, HTTPStatus.CREATED)
+        response = self.comment()
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        # В следующем окне два комментария этого весят 2 * (1 - 30 / 60) = 1
+        self.assertEqual(response['Retry-After'], '90')
+        # Чтение и другие действия не ограничиваются
+        self.assertEqual(self.client.get(reverse('post-comments-list', args=[self.post.pk])).status_code, HTTPStatus.OK)
+        self.assertEqual(self.client.post(reverse('post-likes-list', args=[self.post.pk])).status_code, HTTPStatus.CREATED)
+
+        self.login_as_user(self.other_user)
+        self.assertEqual(self.comment().status_code, HTTPStatus.CREATED)
+
+    def test_previous_window_is_weighted(self, now):
+        self.login_as_user(self.user)
+        like_url = reverse('post-likes-list', args=[self.post.pk])
+        self.assertEqual(self.client.post(like_url).status_code, HTTPStatus.CREATED)
+
+        # Половина следующего окна: предыдущий лайк ещё весит 0.5
+        now.return_value = 6090.0
+        remove_url = reverse('post-likes-delete-like', args=[self.post.pk])
+        response = self.client.delete(remove_url)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '30')
+
+        now.return_value = 6120.0
+        self.assertEqual(self.client.delete(remove_url).status_code, HTTPStatus.NO_CONTENT)
+
+    def test_unconfigured_rate_is_not_throttled(self, now):
+        self.login_as_user(self.user)
+        for _ in range(3):
+            response = self.client.post(reverse('post-list'), {'title': 'Post', 'content': 'Content', 'category': 'OTHER'})
+            self.assertEqual(response.status_code, HTTPStatus.CREATED)
+
+    def test_counters(self, now):
+        stats.register('throttle.comments.checks', 'throttle.comments.throttled')
+        self.login_as_user(self.user)
+        for _ in range(3):
+            self.comment()
+        counters = stats.snapshot()
+        self.assertEqual(counters['throttle.comments.checks'], 3)
+        self.assertEqual(counters['throttle.comments.throttled'], 1)
@@ -0,0 +1,80 @@
+import time
+from http import HTTPStatus
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from blog import trending
+from blog.models import Post, PostScore, Like
+from blog.tasks import update_trending_score
+
+User = get_user_model()
+HOUR = 3600
+
+
+class TrendingTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='testuser@localhost.ru', password='testpass')
+        cls.cars = Post.objects.create(title='Cars', content='Content', author=cls.user, category='CARS')
+        cls.music = Post.objects.create(title='Music', content='Content', author=cls.user, category='MUSIC')
+        cls.quiet = Post.objects.create(title='Quiet', content='Content', author=cls.user, category='MUSIC')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.now = time.time()
+
+    def trending(self, **params):
+        response = self.client.get(reverse('post-trending'), params)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return [post['id'] for post in response.data]
+
+    def test_recent_events_outweigh_old_ones(self):
+        for _ in range(3):
+            update_trending_score(self.cars.pk, trending.LIKE_WEIGHT, self.now - 72 * HOUR)
+        update_trending_score(self.music.pk, trending.LIKE_WEIGHT, self.now)
+        self.assertEqual(self.trending(), [self.music.pk, self.cars.pk])
+
+    def test_comments_weigh_more_than_likes(self):
+        update_trending_score(self.cars.pk, trending.LIKE_WEIGHT, self.now)
+        update_trending_score(self.music.pk, trending.COMMENT_WEIGHT, self.now)
+        self.assertEqual(self.trending(), [self.music.pk, self.cars.pk])
+
+    def test_removed_like_is_subtracted(self):
+        update_trending_score(self.cars.pk, trending.LIKE_WEIGHT, self.now)
+        update_trending_score(self.cars.pk, trending.LIKE_WEIGHT, self.now)
+        update_trending_score(self.music.pk, trending.LIKE_WEIGHT, self.now)
+        update_trending_score(self.music.pk, trending.LIKE_WEIGHT, self.now - HOUR)
+        update_trending_score(self.cars.pk, -trending.LIKE_WEIGHT, self.now)
+        self.assertEqual(self.trending(), [self.music.pk, self.cars.pk])
+        update_trending_score(self.cars.pk, -trending.LIKE_WEIGHT, self.now)
+        self.assertFalse(PostScore.objects.filter(post=self.cars).exists())
+
+    def test_category_filter(self):
+        update_trending_score(self.cars.pk, trending.LIKE_WEIGHT, self.now)
+        update_trending_score(self.music.pk, trending.LIKE_WEIGHT, self.now)
+        self.assertEqual(self.trending(category='MUSIC'), [self.music.pk])
+        response = self.client.get(reverse('post-trending'), {'category': 'UNKNOWN'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_category_change_follows_post(self):
+        update_trending_score(self.cars.pk, trending.LIKE_WEIGHT, self.now)
+        self.cars.category = 'MUSIC'
+        self.cars.save()
+        self.assertEqual(self.trending(category='MUSIC'), [self.cars.pk])
+
+    def test_like_schedules_incremental_update(self):
+        with mock.patch('blog.signals.update_trending_score.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                like = Like.objects.create(user=self.user, post=self.quiet)
+        delay.assert_called_once_with(self.quiet.pk, trending.LIKE_WEIGHT, like.created_at.timestamp())
+
+    def test_single_query(self):
+        update_trending_score(self.cars.pk, trending.LIKE_WEIGHT, self.now)
+        # посты + теги
+        with self.assertNumQueries(2):
+            self.trending(category='CARS')
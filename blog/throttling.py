@@ -0,0 +1,103 @@
+"""
+Ограничение частоты записи по действиям вьюсета: скользящее окно поверх кэша, без записей в базу.
+Счётчик ведётся по фиксированным окнам, а оценка за последние duration секунд -
+это текущее окно плюс предыдущее с весом оставшейся в окне доли времени.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.throttling import SimpleRateThrottle
+
+from . import stats
+
+
+def throttle_counters(scope):
+    return f'throttle.{scope}.checks', f'throttle.{scope}.throttled'
+
+
+for _scope in settings.REST_FRAMEWORK.get('DEFAULT_THROTTLE_RATES', {}):
+    stats.register(*throttle_counters(_scope))
+
+
+class ActionRateThrottle(SimpleRateThrottle):
+    """
+    Scope берётся из throttle_scopes вьюсета по имени действия, лимит - из
+    DEFAULT_THROTTLE_RATES. Действия без scope не ограничиваются.
+    Проверка стоит одного обращения к Redis (pipeline); с локальным кэшем
+    обращений несколько, но все они в памяти процесса.
+    """
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def __init__(self):
+        # Rate зависит от действия, поэтому разбирается в allow_request
+        pass
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, 'throttle_scopes', {}).get(getattr(view, 'action', None))
+        if self.scope is None:
+            return True
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        checks, throttled = throttle_counters(self.scope)
+        now = time.time()
+        window = int(now // self.duration)
+        self.elapsed = now - window * self.duration
+        key = self.get_cache_key(request, view)
+        self.current, self.previous = self.hit(f'{key}:{window}', f'{key}:{window - 1}', checks)
+
+        estimate = self.previous * (1 - self.elapsed / self.duration) + self.current
+        if estimate <= self.num_requests:
+            return True
+        # Отклонённый запрос не занимает место в окне, иначе повторы отодвигали бы Retry-After
+        self.current -= 1
+        cache.decr(f'{key}:{window}')
+        stats.incr(throttled)
+        return False
+
+    def hit(self, current_key, previous_key, counter):
+        """Увеличивает счётчик текущего окна; возвращает (текущее окно, предыдущее)."""
+        timeout = self.duration * 2
+        backend = caches['default']
+        if isinstance(backend, RedisCache):
+            current_key, previous_key = backend.make_key(current_key), backend.make_key(previous_key)
+            client = backend._cache.get_client(current_key, write=True)
+            pipe = client.pipeline(transaction=False)
+            pipe.incr(current_key)
+            pipe.expire(current_key, timeout)
+            pipe.get(previous_key)
+            # Счётчик статистики в той же пачке команд вместо отдельного stats.incr
+            pipe.incr(backend.make_key(f'stats:{counter}'))
+            current, _, previous, _ = pipe.execute()
+            return current, int(previous or 0)
+
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            current = 1
+            if not cache.add(current_key, current, timeout):
+                current = cache.incr(current_key)
+        stats.incr(counter)
+        return current, cache.get(previous_key, 0)
+
+    def wait(self):
+        # Через сколько секунд оценка с ещё одним запросом уложится в лимит
+        room = self.num_requests - 1
+        if self.current <= room:
+            if not self.previous:
+                return None
+            needed = self.duration * (1 - (room - self.current) / self.previous)
+            return max(needed - self.elapsed, 0)
+        needed = self.duration * (1 - room / self.current)
+        return self.duration - self.elapsed + needed
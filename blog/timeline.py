@@ -0,0 +1,235 @@
+import heapq
+import json
+import threading
+from base64 import b64decode, b64encode
+from datetime import datetime, timezone
+
+import redis
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Count, Q
+
+from .models import Post, AuthorSubscription, TagSubscription
+
+User = get_user_model()
+
+POPULAR_KEY = 'feed:popular'
+FANOUT_BATCH_SIZE = 1000
+
+
+def post_score(post):
+    return post.created_at.timestamp()
+
+
+def feed_order(item):
+    # (post_id, score): новые сначала, при равном времени - больший id; курсор - пара (score, id)
+    return item[1], item[0]
+
+
+def encode_cursor(position):
+    score, post_id = position
+    return b64encode(json.dumps({'v': score, 'id': post_id}).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(encoded):
+    """Позиция (score, post_id) из курсора ?before=; ValueError, если курсор битый."""
+    try:
+        data = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+        return float(data['v']), int(data['id'])
+    except Exception:
+        raise ValueError('Invalid cursor.')
+
+
+class LocalTimelineStore:
+    """Ленты в памяти процесса; заменяет Redis в тестах и при разработке."""
+
+    def __init__(self, max_length):
+        self.max_length = max_length
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def add(self, user_ids, entries):
+        with self._lock:
+            for user_id in user_ids:
+                timeline = self._data.setdefault(user_id, {})
+                timeline.update(entries)
+                if len(timeline) > self.max_length:
+                    keep = heapq.nlargest(self.max_length, timeline.items(), key=lambda item: item[1])
+                    self._data[user_id] = dict(keep)
+
+    def range(self, user_id, before=None, limit=20):
+        with self._lock:
+            items = list(self._data.get(user_id, {}).items())
+        if before is not None:
+            items = [item for item in items if feed_order(item) < before]
+        return heapq.nlargest(limit, items, key=feed_order)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisTimelineStore:
+    """Ленты в sorted set'ах Redis: post_id с временем публикации в качестве score."""
+
+    def __init__(self, url, max_length):
+        self.max_length = max_length
+        self.client = redis.Redis.from_url(url)
+
+    def key(self, user_id):
+        return f'timeline:{user_id}'
+
+    def add(self, user_ids, entries):
+        # Одна пачка команд на всех получателей, длину ленты обрезаем сразу
+        pipe = self.client.pipeline(transaction=False)
+        for user_id in user_ids:
+            key = self.key(user_id)
+            pipe.zadd(key, entries)
+            pipe.zremrangebyrank(key, 0, -self.max_length - 1)
+        pipe.execute()
+
+    def range(self, user_id, before=None, limit=20):
+        # При равном score Redis сравнивает member как строки, а лента - id как числа:
+        # записи со score курсора отбираем сами, остальные - строго ниже него
+        key = self.key(user_id)
+        pipe = self.client.pipeline(transaction=False)
+        max_score = '+inf'
+        if before is not None:
+            max_score = f'({before[0]!r}'
+            pipe.zrangebyscore(key, before[0], before[0], withscores=True)
+        # Лишняя запись показывает, не разрезала ли граница страницы записи с одним score
+        pipe.zrevrangebyscore(key, max_score, '-inf', start=0, num=limit + 1, withscores=True)
+        results = pipe.execute()
+        rows = results[-1]
+        if len(rows) > limit and rows[limit][1] == rows[limit - 1][1]:
+            rows += self.client.zrangebyscore(key, rows[limit][1], rows[limit][1], withscores=True)
+        items = {int(member): score for member, score in rows}
+        if before is not None:
+            items.update((int(member), score) for member, score in results[0] if int(member) < before[1])
+        return heapq.nlargest(limit, items.items(), key=feed_order)
+
+    def clear(self):
+        keys = list(self.client.scan_iter('timeline:*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+def local_store_allowed():
+    # fan_out_post и backfill_timeline пишут в ленты из воркера Celery: без Redis
+    # они попали бы в память воркера, а не веб-процесса
+    return not settings.CELERY_BROKER_URL or getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if settings.TIMELINE_REDIS_URL:
+                    _store = RedisTimelineStore(settings.TIMELINE_REDIS_URL, settings.TIMELINE_MAX_LENGTH)
+                elif local_store_allowed():
+                    _store = LocalTimelineStore(settings.TIMELINE_MAX_LENGTH)
+                else:
+                    raise ImproperlyConfigured(
+                        'TIMELINE_REDIS_URL is required when Celery tasks run in a worker process: '
+                        'timelines filled there would never reach the web process.')
+    return _store
+
+
+def popular_sources():
+    """
+    Авторы и теги, у которых подписчиков не меньше FEED_FANOUT_THRESHOLD.
+    Их посты не раскладываются по лентам, а подмешиваются при чтении.
+    """
+    popular = cache.get(POPULAR_KEY)
+    if popular is None:
+        threshold = settings.FEED_FANOUT_THRESHOLD
+        authors = (AuthorSubscription.objects.values('author')
+                   .annotate(total=Count('pk')).filter(total__gte=threshold)
+                   .values_list('author', flat=True))
+        tags = (TagSubscription.objects.values('tag')
+                .annotate(total=Count('pk')).filter(total__gte=threshold)
+                .values_list('tag', flat=True))
+        popular = {'authors': set(authors), 'tags': set(tags)}
+        cache.set(POPULAR_KEY, popular, settings.FEED_POPULAR_CACHE_TIMEOUT)
+    return popular
+
+
+def fan_out(post):
+    """Добавляет пост в ленты подписчиков автора и тегов, кроме популярных источников."""
+    popular = popular_sources()
+    tag_ids = [tag_id for tag_id in post.tags.values_list('id', flat=True) if tag_id not in popular['tags']]
+    sources = Q(tag_subscriptions__tag_id__in=tag_ids)
+    if post.author_id not in popular['authors']:
+        sources |= Q(author_subscriptions__author_id=post.author_id)
+
+    recipients = (User.objects.filter(sources).exclude(pk=post.author_id)
+                  .values_list('pk', flat=True).distinct().order_by('pk'))
+    store = get_store()
+    entries = {post.pk: post_score(post)}
+    batch = []
+    for user_id in recipients.iterator(chunk_size=FANOUT_BATCH_SIZE):
+        batch.append(user_id)
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            store.add(batch, entries)
+            batch = []
+    if batch:
+        store.add(batch, entries)
+
+
+def backfill(user_id, author_id=None, tag_id=None):
+    # Новая подписка: переносим в ленту последние посты источника
+    posts = Post.objects.exclude(author_id=user_id)
+    if author_id is not None:
+        posts = posts.filter(author_id=author_id)
+    else:
+        posts = posts.filter(tags__id=tag_id)
+    rows = posts.order_by('-created_at').values_list('pk', 'created_at')[:settings.TIMELINE_MAX_LENGTH]
+    entries = {pk: created_at.timestamp() for pk, created_at in rows}
+    if entries:
+        get_store().add([user_id], entries)
+
+
+def followed_posts(user):
+    """Посты, которые сейчас должны быть в ленте пользователя."""
+    return Post.objects.filter(
+        Q(author__subscribers__subscriber=user) | Q(tags__subscribers__subscriber=user)
+    ).exclude(author=user)
+
+
+def read_feed(user, before=None, limit=20):
+    """
+    Возвращает id постов ленты (новые сначала, строго после позиции before - пары
+    (score, post_id)) и позицию для следующей страницы. Разложенная лента дополняется постами популярных
+    источников, а отписки и удалённые посты отсеиваются одной проверкой по базе.
+    """
+    entries = dict(get_store().range(user.pk, before, limit))
+
+    popular = popular_sources()
+    pulled = Q()
+    if popular['authors']:
+        pulled |= Q(author_id__in=user.author_subscriptions.filter(author_id__in=popular['authors']).values('author_id'))
+    if popular['tags']:
+        pulled |= Q(tags__id__in=user.tag_subscriptions.filter(tag_id__in=popular['tags']).values('tag_id'))
+    if pulled:
+        posts = Post.objects.filter(pulled).exclude(author=user)
+        if before is not None:
+            created_at = datetime.fromtimestamp(before[0], tz=timezone.utc)
+            posts = posts.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=before[1]))
+        rows = posts.order_by('-created_at', '-pk').values_list('pk', 'created_at').distinct()[:limit]
+        for pk, created_at in rows:
+            entries[pk] = created_at.timestamp()
+
+    ordered = heapq.nlargest(limit, entries.items(), key=feed_order)
+    valid = set(followed_posts(user).filter(pk__in=[pk for pk, _ in ordered]).values_list('pk', flat=True))
+    # Курсор берём по последней просмотренной записи, а не по последней выданной,
+    # иначе страница из одних отсеянных постов зациклила бы клиента
+    next_before = feed_order(ordered[-1]) if len(ordered) == limit else None
+    return [pk for pk, _ in ordered if pk in valid], next_before
+
@@ -0,0 +1,53 @@
+import math
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Post, PostScore
+
+LIKE_WEIGHT = 1.0
+COMMENT_WEIGHT = 2.0
+POST_WEIGHT = 1.0
+
+
+def event_score(weight, timestamp):
+    # log(w * 2^(t / half_life)); растёт линейно со временем, поэтому не переполняется
+    half_life = settings.TRENDING_HALF_LIFE_HOURS * 3600
+    return math.log(weight) + timestamp * math.log(2) / half_life
+
+
+def log_add(a, b):
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def log_subtract(a, b):
+    # None - вклад события не меньше текущего рейтинга (с учётом погрешности), ничего не осталось
+    if b >= a - 1e-9:
+        return None
+    return a + math.log1p(-math.exp(b - a))
+
+
+def apply_event(post_id, weight, timestamp):
+    """Инкрементально добавляет (weight > 0) или убирает (weight < 0) вклад события."""
+    contribution = event_score(abs(weight), timestamp)
+    with transaction.atomic():
+        row = PostScore.objects.select_for_update().filter(post_id=post_id).first()
+        if row is None:
+            if weight < 0:
+                return
+            category = Post.objects.filter(pk=post_id).values_list('category', flat=True).first()
+            if category is None:
+                return
+            PostScore.objects.create(post_id=post_id, category=category, score=contribution)
+            return
+
+        if weight > 0:
+            row.score = log_add(row.score, contribution)
+        else:
+            score = log_subtract(row.score, contribution)
+            if score is None:
+                row.delete()
+                return
+            row.score = score
+        row.save(update_fields=['score', 'updated_at'])
@@ -1,14 +1,23 @@
 from django.urls import path, include
 from rest_framework_nested import routers
+from . import async_views
 from .views import (
     PostViewSet, 
     CommentViewSet,
-    LikeViewSet
+    LikeViewSet,
+    StatsView,
+    RouteStatsView,
+    AuthorSubscriptionViewSet,
+    TagSubscriptionViewSet,
+    FeedView,
+    ExportView,
 )
 
 # Базовый роутер для постов
 router = routers.DefaultRouter()
 router.register(r'posts', PostViewSet, basename='post')
+router.register(r'subscriptions/authors', AuthorSubscriptionViewSet, basename='author-subscription')
+router.register(r'subscriptions/tags', TagSubscriptionViewSet, basename='tag-subscription')
 
 # Вложенный роутер для комментариев
 comments_router = routers.NestedSimpleRouter(
@@ -29,4 +38,12 @@ likes_router.register(
 
 urlpatterns = [
     path('', include(router.urls + comments_router.urls + likes_router.urls)),
+    path('feed/', FeedView.as_view(), name='feed'),
+    path('export/', ExportView.as_view(), name='export'),
+    path('stats/', StatsView.as_view(), name='stats'),
+    path('stats/routes/', RouteStatsView.as_view(), name='route-stats'),
+    # Асинхронные версии чтения постов и комментариев для ASGI
+    path('async/posts/', async_views.post_list, name='async-post-list'),
+    path('async/posts/<int:pk>/', async_views.post_detail, name='async-post-detail'),
+    path('async/posts/<int:post_pk>/comments/', async_views.comment_list, name='async-post-comments-list'),
 ]
\ No newline at end of file
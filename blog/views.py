@@ -1,44 +1,316 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, mixins, filters, status
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAdminUser, IsAuthenticated, SAFE_METHODS
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.views import APIView
+from rest_framework.utils.urls import replace_query_param
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db import transaction
+from django.db.models import F, Q, Count, Exists, Max, OuterRef, Value, Window
+from django.db.models.functions import Greatest, RowNumber
 
-from .models import Post, Comment, Like
-from .serializers import PostSerializer, CommentSerializer, LikeSerializer
+from .models import Post, Comment, Like, AuthorSubscription, TagSubscription
+from .serializers import (
+    PostSerializer,
+    CommentSerializer,
+    LikeSerializer,
+    AuthorSubscriptionSerializer,
+    TagSubscriptionSerializer,
+)
 from .permissions import AuthorOrReadOnly
-from notifications.tasks import send_like_notification
+from .search import PostSearchFilter
+from .pagination import KeysetPagination
+from .response_cache import (
+    POSTS_SCOPE,
+    POST_LIST_SCOPE,
+    post_detail_scope,
+    comment_list_scope,
+    get_versions,
+)
+from .conditional import ConditionalResponseMixin
+from . import export, facets, stats, timeline
+from .tasks import fan_out_post, backfill_timeline
+from blog_project.instrumentation import route_stats
+from notifications.tasks import schedule_like_notification
 
 
-class PostViewSet(viewsets.ModelViewSet):
+def with_viewer_likes(queryset, user):
+    # is_liked считается в том же запросе, что и сами посты
+    if not user.is_authenticated:
+        return queryset
+    return queryset.annotate(is_liked=Exists(Like.objects.filter(post=OuterRef('pk'), user=user)))
+
+
+def post_validators_query(pk, user):
+    # Всё, от чего зависит ответ с постом, одной строкой по первичному ключу
+    fields = ['updated_at', 'likes_count', 'comments_count']
+    if user.is_authenticated:
+        fields.append('is_liked')
+    return with_viewer_likes(Post.objects.filter(pk=pk), user).values_list(*fields)
+
+
+def comment_list_aggregates():
+    # По всем комментариям поста, а не по корням страницы: новый ответ тоже меняет список
+    return {'last_created': Max('created_at'), 'count': Count('pk')}
+
+
+def comment_list_validators(found, version):
+    # Правка текста не меняет ни дат, ни количества - её отражает версия списка
+    return found['last_created'], (found['last_created'], found['count'], version)
+
+
+# Колонки, которые читаются всегда: ключи сортировки и keyset-курсора
+POST_BASE_COLUMNS = ('id', 'created_at', 'updated_at', 'likes_count', 'comments_count')
+
+
+def requested_post_fields(request, list_mode):
+    """Поля ответа из ?fields=; в списках по умолчанию всё, кроме полного текста."""
+    raw = request.query_params.get('fields')
+    if not raw:
+        if list_mode:
+            return [name for name in PostSerializer.output_field_names()
+                    if name not in PostSerializer.list_excluded_fields]
+        return None
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = sorted(set(names) - set(PostSerializer.output_field_names()))
+    if unknown:
+        raise ValidationError({'fields': f'Unknown fields: {", ".join(unknown)}.'})
+    return names
+
+
+def sparse_post_queryset(queryset, fields):
+    # Читаем только нужные колонки; автор в ответе не отдаётся, поэтому и JOIN не нужен
+    if fields is None:
+        return queryset
+    columns = {field.name for field in Post._meta.concrete_fields} & set(fields)
+    queryset = queryset.select_related(None).only(*POST_BASE_COLUMNS, *columns)
+    if 'tags' not in fields:
+        queryset = queryset.prefetch_related(None)
+    return queryset
+
+
+class PostViewSet(ConditionalResponseMixin, viewsets.ModelViewSet):
     queryset = Post.objects.select_related('author').prefetch_related('tags').all()
     serializer_class = PostSerializer
     permission_classes = [AuthorOrReadOnly,]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, PostSearchFilter]
     filterset_fields = ['category']
     search_fields = ['title', 'content']
-    ordering_fields = ['created_at', 'updated_at']
+    ordering_fields = ['created_at', 'updated_at', 'likes_count', 'comments_count']
     ordering = ['-created_at']
+    throttle_scopes = {'create': 'posts', 'update': 'posts', 'partial_update': 'posts', 'destroy': 'posts'}
+    trending_limit = 10
+    trending_max_limit = 100
+    liked_max_ids = 100
+
+    def get_queryset(self):
+        queryset = with_viewer_likes(super().get_queryset(), self.request.user)
+        return sparse_post_queryset(queryset, self.get_post_fields())
+
+    def get_post_fields(self):
+        if self.request.method not in SAFE_METHODS:
+            return None
+        return requested_post_fields(self.request, list_mode=self.action in ('list', 'trending'))
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method in SAFE_METHODS:
+            kwargs.setdefault('fields', self.get_post_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        scopes = [POSTS_SCOPE, POST_LIST_SCOPE]
+        return self.conditional_response(request, scopes, self.list_validators, self.list_with_facets, *args, **kwargs)
+
+    def list_validators(self, request):
+        # Версия списка поднимается при любой записи постов, тегов, лайков и комментариев
+        return None, get_versions([POSTS_SCOPE, POST_LIST_SCOPE])
+
+    def list_with_facets(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if request.query_params.get('facets') in ('1', 'true') and isinstance(response.data, dict):
+            response.data['facets'] = self.get_facets(request)
+        return response
+
+    def get_facets(self, request):
+        # Без фильтров и поиска отдаём общие счётчики из кэша
+        if facets.is_unfiltered(request.query_params):
+            return facets.get_unfiltered_facets()
+        # Поиск в фасетах только отбирает посты: ранг и сниппеты для подсчёта не нужны
+        queryset = self.get_queryset()
+        for backend in self.filter_backends:
+            if issubclass(backend, PostSearchFilter):
+                queryset = backend().filter_matches(request, queryset, self)
+            else:
+                queryset = backend().filter_queryset(request, queryset, self)
+        return facets.compute_facets(queryset)
+
+    def retrieve(self, request, *args, **kwargs):
+        scopes = [POSTS_SCOPE, post_detail_scope(kwargs['pk'])]
+        return self.conditional_response(request, scopes, self.retrieve_validators, super().retrieve, *args, **kwargs)
+
+    def retrieve_validators(self, request):
+        try:
+            row = post_validators_query(self.kwargs['pk'], request.user).first()
+        except (TypeError, ValueError):
+            return None
+        if row is None:
+            return None
+        return None, row
+
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        # Одно чтение по индексу (category, -score) или (-score), без COUNT
+        queryset = self.get_queryset().filter(trending_score__isnull=False)
+        category = request.query_params.get('category')
+        if category:
+            if category not in dict(Post.CATEGORY_CHOICES):
+                return Response({'category': 'Unknown category.'}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(trending_score__category=category)
+        try:
+            limit = min(int(request.query_params.get('limit', self.trending_limit)), self.trending_max_limit)
+        except ValueError:
+            limit = self.trending_limit
+        posts = queryset.order_by('-trending_score__score')[:max(limit, 1)]
+        return Response(self.get_serializer(posts, many=True).data)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def liked(self, request):
+        """Состояние лайка для списка постов ?ids=1,2,3 одним запросом."""
+        try:
+            ids = [int(pk) for pk in request.query_params.get('ids', '').split(',') if pk.strip()]
+        except ValueError:
+            return Response({'ids': 'Expected a comma-separated list of post ids.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.liked_max_ids:
+            return Response({'ids': f'No more than {self.liked_max_ids} ids per request.'}, status=status.HTTP_400_BAD_REQUEST)
+        liked = set(Like.objects.filter(user=request.user, post_id__in=ids).values_list('post_id', flat=True))
+        return Response({str(pk): pk in liked for pk in ids})
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        post = serializer.save(author=self.request.user)
+        # Раскладываем пост по лентам подписчиков, когда теги уже сохранены
+        transaction.on_commit(lambda: fan_out_post.delay(post.id))
+
+def build_comment_tree(nodes):
+    """
+    Раскладывает комментарии, отсортированные по (tree_id, lft), по родителям.
+    Заполняет кэш детей MPTT, поэтому get_children() больше не ходит в базу.
+    Возвращает список узлов, чьих родителей нет среди nodes.
+    """
+    by_id = {}
+    top_nodes = []
+    for node in nodes:
+        node._cached_children = []
+        parent = by_id.get(node.parent_id)
+        if parent is not None:
+            node.parent = parent
+            parent._cached_children.append(node)
+        else:
+            top_nodes.append(node)
+        by_id[node.pk] = node
+    return top_nodes
 
-class CommentViewSet(viewsets.ModelViewSet):
+
+def thread_descendants(queryset, parents, preview):
+    """
+    Запрос за первыми preview ответами каждого узла в поддеревьях parents (непустых).
+    Ответы, чьи родители не попали в выборку, отбрасывает attach_threads.
+    """
+    subtrees = Q()
+    for parent in parents:
+        subtrees |= Q(tree_id=parent.tree_id, lft__gt=parent.lft, rght__lt=parent.rght)
+    return (
+        queryset.filter(subtrees)
+        .annotate(position=Window(RowNumber(), partition_by=F('parent_id'), order_by=F('lft').asc()))
+        .filter(position__lte=preview)
+    )
+
+
+def attach_threads(parents, descendants):
+    nodes = sorted([*parents, *descendants], key=lambda node: (node.tree_id, node.lft))
+    trees = {node.pk: node for node in build_comment_tree(nodes)}
+    return [trees[parent.pk] for parent in parents if parent.pk in trees]
+
+
+class CommentViewSet(ConditionalResponseMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = [AuthorOrReadOnly,]
+    pagination_class = KeysetPagination
+    replies_preview = 3
+    throttle_scopes = {'create': 'comments', 'destroy': 'comments'}
+
     def get_queryset(self):
         # Фильтруем комментарии по post_pk из URL
-        return Comment.objects.filter(post_id=self.kwargs['post_pk'])
+        return Comment.objects.filter(post_id=self.kwargs['post_pk']).select_related('author')
+
+    def get_threads(self, parents):
+        if not parents:
+            return []
+        descendants = thread_descendants(self.get_queryset(), parents, self.replies_preview)
+        return attach_threads(parents, descendants)
+
+    def list(self, request, *args, **kwargs):
+        scopes = [POSTS_SCOPE, comment_list_scope(self.kwargs['post_pk'])]
+        return self.conditional_response(request, scopes, self.list_validators, self.list_threads, *args, **kwargs)
+
+    def list_validators(self, request):
+        post_id = self.kwargs['post_pk']
+        try:
+            found = Comment.objects.filter(post_id=post_id).aggregate(**comment_list_aggregates())
+        except (TypeError, ValueError):
+            return None
+        return comment_list_validators(found, get_versions([comment_list_scope(post_id)])[0])
+
+    def list_threads(self, request, *args, **kwargs):
+        # На верхнем уровне только корневые комментарии, ответы вложены в них
+        roots = self.filter_queryset(self.get_queryset()).filter(level=0)
+        return self.paginated_threads(roots)
+
+    def paginated_threads(self, queryset):
+        page = self.paginate_queryset(queryset)
+        threads = self.get_threads(page if page is not None else list(queryset))
+        serializer = self.get_serializer(threads, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        comment = self.get_object()
+        serializer = self.get_serializer(self.get_threads([comment])[0])
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def replies(self, request, *args, **kwargs):
+        scopes = [POSTS_SCOPE, comment_list_scope(self.kwargs['post_pk'])]
+        return self.cached_response(request, scopes, self.list_replies, *args, **kwargs)
+
+    def list_replies(self, request, *args, **kwargs):
+        # Следующие ответы на комментарий, каждый со своими первыми ответами
+        comment = self.get_object()
+        return self.paginated_threads(self.get_queryset().filter(parent=comment).order_by('lft'))
 
     def perform_create(self, serializer):
         # Автоматически привязываем пост из URL
         post_id = self.kwargs['post_pk']
-        serializer.save(
-            author=self.request.user,
-            post_id=post_id  
-        )
+        with transaction.atomic():
+            serializer.save(
+                author=self.request.user,
+                post_id=post_id  
+            )
+            Post.objects.filter(pk=post_id).update(comments_count=F('comments_count') + 1)
+
+    def perform_destroy(self, instance):
+        # Вместе с комментарием удаляется всё его поддерево
+        removed = (instance.rght - instance.lft + 1) // 2
+        with transaction.atomic():
+            instance.delete()
+            Post.objects.filter(pk=instance.post_id).update(
+                comments_count=Greatest(F('comments_count') - removed, Value(0))
+            )
 
     def destroy(self, request, *args, **kwargs):
         comment = self.get_object()
@@ -57,10 +329,12 @@ class CommentViewSet(viewsets.ModelViewSet):
 class LikeViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,viewsets.GenericViewSet):
     serializer_class = LikeSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    throttle_scopes = {'create': 'likes', 'delete_like': 'likes'}
 
     def get_queryset(self):
         # Фильтруем лайки по post_pk из URL
-        return Like.objects.filter(post_id=self.kwargs['post_pk'])
+        return Like.objects.filter(post_id=self.kwargs['post_pk']).order_by('-id')
 
     @transaction.atomic
     def create(self, request, *args, **kwargs):
@@ -77,7 +351,10 @@ class LikeViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,viewsets.Generi
                 {'detail': 'Вы уже лайкали этот пост'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        send_like_notification(post.id, request.user.id)
+        Post.objects.filter(pk=post.pk).update(likes_count=F('likes_count') + 1)
+        if post.author_id != request.user.id:
+            # Уведомление формирует Celery-воркер, и только после коммита лайка
+            transaction.on_commit(lambda: schedule_like_notification(post.id, like.created_at))
         return Response(
             LikeSerializer(like).data,
             status=status.HTTP_201_CREATED
@@ -87,8 +364,95 @@ class LikeViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,viewsets.Generi
     def delete_like(self, request, *args, **kwargs):
         like = get_object_or_404(Like, user=request.user, post_id=self.kwargs['post_pk'])
         like.delete()
+        Post.objects.filter(pk=like.post_id, likes_count__gt=0).update(likes_count=F('likes_count') - 1)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+class AuthorSubscriptionViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
+                                mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    serializer_class = AuthorSubscriptionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return AuthorSubscription.objects.filter(subscriber=self.request.user).select_related('author').order_by('-id')
+
+    def perform_create(self, serializer):
+        subscription = serializer.save()
+        transaction.on_commit(lambda: backfill_timeline.delay(subscription.subscriber_id, author_id=subscription.author_id))
+
+
+class TagSubscriptionViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
+                             mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    serializer_class = TagSubscriptionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return TagSubscription.objects.filter(subscriber=self.request.user).select_related('tag').order_by('-id')
+
+    def perform_create(self, serializer):
+        subscription = serializer.save()
+        transaction.on_commit(lambda: backfill_timeline.delay(subscription.subscriber_id, tag_id=subscription.tag_id))
+
+
+class FeedView(APIView):
+    """
+    Лента постов от авторов и тегов, на которые подписан пользователь.
+    Читается из заранее разложенной ленты; страницы листаются курсором ?before=.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        before = request.query_params.get('before')
+        if before is not None:
+            try:
+                before = timeline.decode_cursor(before)
+            except ValueError:
+                return Response({'before': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        post_ids, next_before = timeline.read_feed(request.user, before, settings.FEED_PAGE_SIZE)
+        fields = requested_post_fields(request, list_mode=True)
+        posts = Post.objects.select_related('author').prefetch_related('tags')
+        posts = sparse_post_queryset(with_viewer_likes(posts, request.user), fields).in_bulk(post_ids)
+        serializer = PostSerializer([posts[pk] for pk in post_ids if pk in posts], many=True, fields=fields,
+                                    context={'request': request})
+        next_url = None
+        if next_before is not None:
+            next_url = replace_query_param(request.build_absolute_uri(), 'before', timeline.encode_cursor(next_before))
+        return Response({'next': next_url, 'results': serializer.data})
+
+
+class ExportView(APIView):
+    """
+    Потоковая выгрузка в NDJSON для аналитики: ?types=posts,comments,likes&updated_since=<ISO>.
+    Последняя строка - водяной знак для следующей инкрементальной выгрузки.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            types = export.parse_types(request.query_params.get('types'))
+            since = export.parse_since(request.query_params.get('updated_since'))
+        except ValueError as error:
+            return Response({'detail': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        response = StreamingHttpResponse(export.export_lines(types, since), content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="blog-export.ndjson"'
+        return response
+
+
+class StatsView(APIView):
+    # Счётчики для сбора метрик (кэш ответов и т.п.)
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(stats.snapshot())
+
+
+class RouteStatsView(APIView):
+    # Гистограммы времени ответа по маршрутам (в пределах текущего процесса)
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(route_stats())
+
 # class LikeViewSet(viewsets.ViewSet):
 #     permission_classes = [IsAuthenticatedOrReadOnly]
 
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blog_project.settings')
+# Синхронный код здесь выполняется в разных потоках, и постоянные соединения копились бы в каждом
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
@@ -0,0 +1,81 @@
+"""
+Чтение с реплики, запись в основную базу. Безопасные (GET/HEAD/OPTIONS) запросы читают
+с реплики, пока сами ничего не записали; после первой записи весь остаток запроса
+идёт в основную базу, чтобы запрос видел свои изменения. Вне HTTP-запросов
+(Celery, команды) всё идёт в основную базу.
+"""
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_state = ContextVar('db_routing', default=None)
+
+
+class RoutingState:
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def stick_to_primary():
+    # Всё, что читается дальше в этом запросе, должно видеть только что записанное
+    state = _state.get()
+    if state is not None:
+        state.use_replica = False
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replica:
+            return PRIMARY
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        stick_to_primary()
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика - копия основной базы, объекты из обеих можно связывать
+        return {obj1._state.db, obj2._state.db} <= {PRIMARY, REPLICA}
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема на реплику приходит вместе с данными
+        return db == PRIMARY
+
+
+class ReadYourWritesMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _state.set(RoutingState(request.method in SAFE_METHODS and replica_configured()))
+        try:
+            return self.get_response(request)
+        finally:
+            _state.reset(token)
+
+    async def __acall__(self, request):
+        # sync_to_async копирует контекст, поэтому ORM в потоке видит то же состояние
+        token = _state.set(RoutingState(request.method in SAFE_METHODS and replica_configured()))
+        try:
+            return await self.get_response(request)
+        finally:
+            _state.reset(token)
@@ -0,0 +1,172 @@
+"""
+Инструментирование запросов: время ответа, число и время SQL-запросов, время сериализации.
+Отдаёт заголовок Server-Timing, логирует медленные запросы и копит гистограммы по маршрутам.
+"""
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+# Верхние границы корзин гистограммы, мс
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, float('inf'))
+SLOWEST_QUERIES = 3
+
+_current = ContextVar('request_metrics', default=None)
+_routes = {}
+_routes_lock = threading.Lock()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.slowest = []
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.sql_time += duration
+        self.slowest.append((duration, sql))
+        self.slowest.sort(key=lambda item: item[0], reverse=True)
+        del self.slowest[SLOWEST_QUERIES:]
+
+    def server_timing(self, total):
+        return (
+            f'db;dur={self.sql_time * 1000:.2f};desc="{self.queries} queries", '
+            f'serializer;dur={self.serializer_time * 1000:.2f}, '
+            f'total;dur={total * 1000:.2f}'
+        )
+
+
+def current_metrics():
+    return _current.get()
+
+
+def record_sql(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - start)
+
+
+def install_sql_recorder(connection, **kwargs):
+    # Обёртка ставится на соединение навсегда, а метрики берутся из contextvar запроса:
+    # так учитываются и запросы асинхронных представлений, которые идут из другого потока
+    if record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_sql)
+
+
+connection_created.connect(install_sql_recorder)
+
+
+def record_route(route, total_ms, queries):
+    with _routes_lock:
+        stats = _routes.get(route)
+        if stats is None:
+            stats = _routes[route] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'queries': 0,
+                                      'buckets': [0] * len(BUCKETS)}
+        stats['count'] += 1
+        stats['total_ms'] += total_ms
+        stats['max_ms'] = max(stats['max_ms'], total_ms)
+        stats['queries'] += queries
+        for index, bound in enumerate(BUCKETS):
+            if total_ms <= bound:
+                stats['buckets'][index] += 1
+                break
+
+
+def route_stats():
+    labels = [str(bound) if bound != float('inf') else '+Inf' for bound in BUCKETS]
+    with _routes_lock:
+        return {
+            route: {
+                'count': stats['count'],
+                'avg_ms': round(stats['total_ms'] / stats['count'], 2),
+                'max_ms': round(stats['max_ms'], 2),
+                'avg_queries': round(stats['queries'] / stats['count'], 2),
+                'buckets': dict(zip(labels, stats['buckets'])),
+            }
+            for route, stats in _routes.items()
+        }
+
+
+def reset_route_stats():
+    with _routes_lock:
+        _routes.clear()
+
+
+class RequestTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        total = time.perf_counter() - metrics.started
+        response['Server-Timing'] = metrics.server_timing(total)
+
+        match = request.resolver_match
+        route = f'{request.method} {match.view_name if match else "unresolved"}'
+        total_ms = total * 1000
+        record_route(route, total_ms, metrics.queries)
+
+        if total_ms >= settings.SLOW_REQUEST_THRESHOLD_MS:
+            logger.warning(
+                'Slow request %s %s: %.1f ms, %d queries (%.1f ms SQL), serializer %.1f ms. Slowest SQL:\n%s',
+                request.method, request.get_full_path(), total_ms, metrics.queries,
+                metrics.sql_time * 1000, metrics.serializer_time * 1000,
+                '\n'.join(f'  {duration * 1000:.1f} ms: {sql}' for duration, sql in metrics.slowest),
+            )
+        return response
+
+
+class TimedSerializerMixin:
+    """Учитывает время to_representation в метриках запроса (вложенные вызовы - один раз)."""
+
+    def to_representation(self, instance):
+        metrics = _current.get()
+        if metrics is None or metrics.serializer_depth:
+            return super().to_representation(instance)
+        metrics.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_depth -= 1
+            metrics.serializer_time += time.perf_counter() - start
@@ -50,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog_project.instrumentation.RequestTimingMiddleware',
+    'blog_project.db_router.ReadYourWritesMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,18 +79,48 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'blog_project.wsgi.application'
+# Поток уведомлений (SSE) работает только под ASGI
+ASGI_APPLICATION = 'blog_project.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Соединения живут между запросами и проверяются перед повторным использованием.
+# Под ASGI у каждого запроса свой поток, и постоянные соединения копятся: blog_project.asgi
+# выставляет DB_CONN_MAX_AGE=0 по умолчанию, если его не задали явно.
+# WAL позволяет читать во время записи; IMMEDIATE берёт блокировку записи в начале
+# транзакции, а не посреди неё, и timeout ждёт её вместо ошибки database is locked.
+SQLITE_OPTIONS = {
+    'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA cache_size=-20000;',
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': 20,
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / os.environ.get('DB_NAME'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': SQLITE_OPTIONS,
     }
 }
 
+# Реплика для чтения (копия основной базы, которую поддерживает репликация),
+# см. blog_project.db_router. migrate её не трогает: файл должен заранее быть копией
+# основной базы со схемой и данными, иначе не пройдёт проверка blog.E002.
+# В тестах это та же база, что и default.
+if os.environ.get('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / os.environ.get('DB_REPLICA_NAME'),
+        'OPTIONS': {**SQLITE_OPTIONS, 'init_command': SQLITE_OPTIONS['init_command'] + ' PRAGMA query_only=ON;'},
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['blog_project.db_router.PrimaryReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -135,20 +167,35 @@ AUTH_USER_MODEL = 'users.CustomUser'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # Лимиты на запись по действиям, см. throttle_scopes во вьюсетах
+    'DEFAULT_THROTTLE_CLASSES': (
+        'blog.throttling.ActionRateThrottle',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'posts': '30/hour',
+        'comments': '30/min',
+        'likes': '120/min',
+    },
 }
 
 SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
     'ACCESS_TOKEN_LIFETIME': timedelta(days=5),
+    # В токен пишется хэш пароля: смена пароля отзывает выданные токены
+    'CHECK_REVOKE_TOKEN': True,
+    'USER_AUTHENTICATION_RULE': 'users.authentication.user_authentication_rule',
 }
 
+# Сколько секунд пользователь из JWT живёт в кэше (сбрасывается при сохранении пользователя)
+AUTH_USER_CACHE_TIMEOUT = 60
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'SERIALIZERS': {
@@ -160,5 +207,68 @@ DJOSER = {
 
 REDIS_HOST = os.environ.get('REDIS_HOST')
 REDIS_PORT = os.environ.get('REDIS_PORT')
+
+# Общий Redis-кэш в проде, локальная память процесса для разработки
+if REDIS_HOST:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': f'redis://{REDIS_HOST}:{REDIS_PORT or 6379}/1',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# Запросы дольше этого порога (мс) логируются вместе с самыми медленными SQL
+SLOW_REQUEST_THRESHOLD_MS = 500
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'blog_project.instrumentation': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
+
+# Время жизни закэшированных ответов для анонимных GET (секунды)
+RESPONSE_CACHE_TIMEOUT = 300
 CELERY_BROKER_URL =os.environ.get('CELERY_BROKER_URL')
-CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND')
\ No newline at end of file
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND')
+
+# Лайки одного поста за это окно (в секундах) объединяются в одно уведомление
+LIKE_NOTIFICATION_WINDOW = 60
+
+# Период полураспада рейтинга в ленте популярного (часы)
+TRENDING_HALF_LIFE_HOURS = 24
+
+# Ленты подписок: длина ленты на пользователя, порог подписчиков, после которого
+# посты автора или тега не раскладываются по лентам, а подмешиваются при чтении
+TIMELINE_REDIS_URL = f'redis://{REDIS_HOST}:{REDIS_PORT or 6379}/2' if REDIS_HOST else None
+TIMELINE_MAX_LENGTH = 500
+FEED_FANOUT_THRESHOLD = 1000
+FEED_POPULAR_CACHE_TIMEOUT = 300
+FEED_PAGE_SIZE = 20
+
+# Фасеты списка постов: сколько тегов показывать и сколько живут общие счётчики (секунды)
+FACETS_TAGS_LIMIT = 20
+FACETS_CACHE_TIMEOUT = 600
+
+# Сколько секунд хранится закэшированный счётчик непрочитанных уведомлений
+UNREAD_COUNT_TIMEOUT = 300
+
+# Поток уведомлений (SSE): Redis для публикации из Celery и других процессов,
+# интервал heartbeat, пауза перед переподключением клиента, сколько пропущенных отдавать
+# и сколько секунд живёт одноразовый билет на подключение
+NOTIFICATIONS_REDIS_URL = f'redis://{REDIS_HOST}:{REDIS_PORT or 6379}/3' if REDIS_HOST else None
+SSE_HEARTBEAT_SECONDS = 15
+SSE_RETRY_MS = 5000
+SSE_REPLAY_LIMIT = 100
+SSE_TICKET_SECONDS = 30
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+from .pubsub import local_broker_allowed
+
+
+@register()
+def check_notifications_broker(app_configs, **kwargs):
+    # Проверка при старте: иначе ошибка всплыла бы только при первой публикации
+    if settings.NOTIFICATIONS_REDIS_URL or local_broker_allowed():
+        return []
+    return [Error(
+        'NOTIFICATIONS_REDIS_URL is not set, but Celery tasks run in a worker process.',
+        hint='Set REDIS_HOST so the worker and the SSE streams share a Redis channel, '
+             'or set CELERY_TASK_ALWAYS_EAGER for a single-process setup.',
+        id='notifications.E001',
+    )]
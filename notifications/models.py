@@ -9,6 +9,14 @@ class Notification(models.Model):
     message = models.CharField(max_length=255)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    post = models.ForeignKey('blog.Post', on_delete=models.CASCADE, null=True, blank=True)
+    # Сколько событий (лайков) объединено в одно уведомление
+    actor_count = models.PositiveIntegerField(default=1)
+    # Ключ группировки: повтор задачи обновляет ту же строку, а не создаёт новую
+    group_key = models.CharField(max_length=100, unique=True, null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=['user', 'is_read', 'created_at'])]
 
     def __str__(self):
         return f'Notification for {self.user}: {self.message}'
@@ -0,0 +1,131 @@
+"""
+Публикация событий уведомлений по каналу пользователя. Публикуют синхронный код
+(сигналы, Celery), слушают асинхронные SSE-потоки. Redis нужен, когда публикует
+другой процесс; локальный брокер работает в пределах одного процесса (тесты, один узел).
+Воркер Celery - всегда другой процесс, поэтому без Redis при нём брокер не создаётся.
+"""
+import asyncio
+import json
+import threading
+
+import redis
+import redis.asyncio
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .serializers import NotificationSerializer
+
+
+def channel_name(user_id):
+    return f'notifications:{user_id}'
+
+
+class LocalSubscription:
+    def __init__(self, broker, user_id, entry):
+        self.broker = broker
+        self.user_id = user_id
+        self.entry = entry
+
+    async def get(self, timeout):
+        # None, если за timeout секунд ничего не пришло
+        try:
+            return await asyncio.wait_for(self.entry[1].get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker.unsubscribe(self.user_id, self.entry)
+
+
+class LocalBroker:
+
+    def __init__(self):
+        self.subscribers = {}
+        self.lock = threading.Lock()
+
+    def publish(self, user_id, event):
+        with self.lock:
+            targets = list(self.subscribers.get(user_id, ()))
+        # Публикуют из других потоков, а очередь принадлежит циклу событий подписчика
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # Цикл подписчика уже закрыт
+                pass
+
+    async def subscribe(self, user_id):
+        entry = (asyncio.get_running_loop(), asyncio.Queue())
+        with self.lock:
+            self.subscribers.setdefault(user_id, []).append(entry)
+        return LocalSubscription(self, user_id, entry)
+
+    def unsubscribe(self, user_id, entry):
+        with self.lock:
+            entries = self.subscribers.get(user_id, [])
+            if entry in entries:
+                entries.remove(entry)
+            if not entries:
+                self.subscribers.pop(user_id, None)
+
+
+class RedisSubscription:
+    def __init__(self, client, pubsub):
+        self.client = client
+        self.pubsub = pubsub
+
+    async def get(self, timeout):
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        return json.loads(message['data'])
+
+    async def close(self):
+        await self.pubsub.aclose()
+        await self.client.aclose()
+
+
+class RedisBroker:
+
+    def __init__(self, url):
+        self.url = url
+        self.client = redis.Redis.from_url(url)
+
+    def publish(self, user_id, event):
+        self.client.publish(channel_name(user_id), json.dumps(event))
+
+    async def subscribe(self, user_id):
+        # У каждого потока своё соединение: подписка занимает его целиком
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel_name(user_id))
+        return RedisSubscription(client, pubsub)
+
+
+def local_broker_allowed():
+    # Задачи Celery выполняются в этом же процессе или Celery не настроен вовсе
+    return not settings.CELERY_BROKER_URL or getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                if settings.NOTIFICATIONS_REDIS_URL:
+                    _broker = RedisBroker(settings.NOTIFICATIONS_REDIS_URL)
+                elif local_broker_allowed():
+                    _broker = LocalBroker()
+                else:
+                    raise ImproperlyConfigured(
+                        'NOTIFICATIONS_REDIS_URL is required when Celery tasks run in a worker process: '
+                        'notifications published there would never reach the SSE streams.')
+    return _broker
+
+
+def publish_notification(notification):
+    get_broker().publish(notification.user_id, dict(NotificationSerializer(notification).data))
@@ -1,9 +1,13 @@
 from rest_framework import serializers
 from .models import Notification
+from blog_project.instrumentation import TimedSerializerMixin
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Notification
-        fields = '__all__'
-        read_only_fields = ['user', 'created_at']
-        
\ No newline at end of file
+        exclude = ['group_key']
+        read_only_fields = ['user', 'created_at', 'post', 'actor_count']
+
+
+class NotificationIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000)
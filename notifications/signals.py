@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Notification
+from .pubsub import publish_notification
+from .unread import invalidate_unread_count
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def reset_unread_count(sender, instance, **kwargs):
+    invalidate_unread_count(instance.user_id)
+
+
+@receiver(post_save, sender=Notification)
+def push_notification(sender, instance, **kwargs):
+    # Открытые SSE-потоки получают уведомление только после коммита
+    transaction.on_commit(lambda: publish_notification(instance))
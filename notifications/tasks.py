@@ -1,20 +1,81 @@
+import time
+from datetime import datetime, timedelta, timezone
+
 from celery import shared_task
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.text import Truncator
 from .models import Notification
-from blog.models import Post
+from .pubsub import publish_notification
+from .unread import invalidate_unread_count
+from blog.models import Post, Like
 
 User = get_user_model()
 
+
+def like_notification_window(timestamp=None):
+    if timestamp is None:
+        timestamp = time.time()
+    return int(timestamp // settings.LIKE_NOTIFICATION_WINDOW)
+
+
+def schedule_like_notification(post_id, created_at):
+    """
+    Ставит одну задачу на пост и временное окно: лайки, пришедшие в это окно,
+    попадут в одно уведомление. Вызывать после коммита транзакции.
+    Окно считается по created_at лайка - так же, как его отбирает send_like_notification,
+    даже если коммит пришёлся уже на следующее окно.
+    """
+    window = like_notification_window(created_at.timestamp())
+    countdown = (window + 1) * settings.LIKE_NOTIFICATION_WINDOW - time.time() + 1
+    if not cache.add(f'like-notification:{post_id}:{window}', True, settings.LIKE_NOTIFICATION_WINDOW * 2):
+        if countdown > 0:
+            # Задача окна ещё не запускалась и учтёт этот лайк
+            return
+        # Окно уже обработано без этого лайка: задача идемпотентна, пересчитываем
+    # Запускаем после закрытия окна, чтобы учесть все лайки из него
+    send_like_notification.apply_async((post_id, window), countdown=max(countdown, 0))
+
+
+def like_message(liker, others, post):
+    title = Truncator(post.title).chars(100)
+    if not others:
+        return f'{liker} liked your post "{title}"'
+    return f'{liker} and {others} {"other" if others == 1 else "others"} liked your post "{title}"'
+
+
 @shared_task
-def send_like_notification(post_id,user_id):
+def send_like_notification(post_id, window):
+    # Задача идемпотентна: уведомление пишется upsert'ом по group_key
     try:
         post = Post.objects.get(id=post_id)
-        liker = User.objects.get(id=user_id)
-        recipient = post.author
-        if liker != recipient:
-            Notification.objects.create(
-                user=recipient,
-                message=f'{liker.username} liked your post "{post.title}"',
-            )
     except Post.DoesNotExist:
-        pass
\ No newline at end of file
+        return
+
+    start = datetime.fromtimestamp(window * settings.LIKE_NOTIFICATION_WINDOW, tz=timezone.utc)
+    end = start + timedelta(seconds=settings.LIKE_NOTIFICATION_WINDOW)
+    likes = (
+        Like.objects.filter(post_id=post_id, created_at__gte=start, created_at__lt=end)
+        .exclude(user_id=post.author_id)
+    )
+    count = likes.count()
+    if not count:
+        return
+    latest = likes.select_related('user').order_by('-created_at', '-id').first()
+
+    Notification.objects.bulk_create(
+        [Notification(
+            user_id=post.author_id,
+            post=post,
+            actor_count=count,
+            group_key=f'like:{post_id}:{window}',
+            message=like_message(latest.user.username, count - 1, post),
+        )],
+        update_conflicts=True,
+        unique_fields=['group_key'],
+        update_fields=['message', 'actor_count'],
+    )
+    # bulk_create не шлёт сигналы, поэтому счётчик непрочитанных сбрасываем и поток уведомляем сами
+    invalidate_unread_count(post.author_id)
+    publish_notification(Notification.objects.get(group_key=f'like:{post_id}:{window}'))
@@ -1,3 +1,241 @@
-from django.test import TestCase
+import asyncio
+from datetime import datetime, timezone
+from unittest import mock
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from blog.models import Post, Like
+from notifications.models import Notification
+from notifications.checks import check_notifications_broker
+from notifications.pubsub import LocalBroker, get_broker
+from notifications.tasks import like_notification_window, schedule_like_notification, send_like_notification
 
-# Create your tests here.
+User = get_user_model()
+
+
+class LikeNotificationTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author', email='author@localhost.ru', password='testpass')
+        cls.alice = User.objects.create_user(username='alice', email='alice@localhost.ru', password='testpass')
+        cls.bob = User.objects.create_user(username='bob', email='bob@localhost.ru', password='testpass')
+        cls.post = Post.objects.create(title='Test Post', content='Test Content', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        # Пересчёт рейтинга тоже уходит в Celery после коммита - здесь он не нужен
+        patcher = mock.patch('blog.signals.update_trending_score.delay')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def like_as(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return self.client.post(reverse('post-likes-list', args=[self.post.pk]))
+
+    def test_likes_in_one_window_schedule_one_task(self):
+        with mock.patch('notifications.tasks.send_like_notification.apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.like_as(self.alice)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.like_as(self.bob)
+        apply_async.assert_called_once()
+        self.assertEqual(apply_async.call_args.args[0][0], self.post.pk)
+
+    def test_self_like_schedules_nothing(self):
+        with mock.patch('notifications.tasks.send_like_notification.apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.like_as(self.author)
+        apply_async.assert_not_called()
+
+    def test_task_coalesces_likes_and_is_idempotent(self):
+        like = Like.objects.create(user=self.alice, post=self.post)
+        Like.objects.create(user=self.bob, post=self.post)
+        Like.objects.create(user=self.author, post=self.post)
+        window = like_notification_window(like.created_at.timestamp())
+
+        send_like_notification(self.post.pk, window)
+        send_like_notification(self.post.pk, window)
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.user, self.author)
+        self.assertEqual(notification.actor_count, 2)
+        self.assertEqual(notification.message, 'bob and 1 other liked your post "Test Post"')
+
+    def test_window_follows_like_time_not_commit_time(self):
+        length = settings.LIKE_NOTIFICATION_WINDOW
+        # Лайк создан в конце окна 99, а закоммичен уже в окне 100
+        created_at = datetime.fromtimestamp(100 * length - 0.5, tz=timezone.utc)
+        with mock.patch('notifications.tasks.send_like_notification.apply_async') as apply_async:
+            with mock.patch('notifications.tasks.time.time', return_value=100 * length + 0.5):
+                schedule_like_notification(self.post.pk, created_at)
+                schedule_like_notification(self.post.pk, created_at)
+            self.assertEqual(apply_async.call_count, 1)
+            # Задача окна уже отработала - запоздавший лайк запускает пересчёт
+            with mock.patch('notifications.tasks.time.time', return_value=100 * length + 5):
+                schedule_like_notification(self.post.pk, created_at)
+        self.assertEqual([call.args[0] for call in apply_async.call_args_list], [(self.post.pk, 99)] * 2)
+
+    def test_task_without_likes_creates_nothing(self):
+        send_like_notification(self.post.pk, like_notification_window())
+        send_like_notification(0, like_notification_window())
+        self.assertFalse(Notification.objects.exists())
+
+
+class UnreadNotificationsTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='testuser@localhost.ru', password='testpass')
+        cls.other_user = User.objects.create_user(username='otheruser', email='otheruser@localhost.ru', password='testpass')
+        cls.notifications = [Notification.objects.create(user=cls.user, message=f'n{i}') for i in range(3)]
+        cls.foreign = Notification.objects.create(user=cls.other_user, message='foreign')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def unread_count(self):
+        return self.client.get(reverse('notification-unread-count')).data['unread_count']
+
+    def test_unread_count_is_cached(self):
+        self.assertEqual(self.unread_count(), 3)
+        # Пользователь для JWT тоже берётся из кэша
+        with self.assertNumQueries(0):
+            self.assertEqual(self.unread_count(), 3)
+
+    def test_new_notification_resets_counter(self):
+        self.assertEqual(self.unread_count(), 3)
+        Notification.objects.create(user=self.user, message='new')
+        self.assertEqual(self.unread_count(), 4)
+
+    def test_mark_read_list(self):
+        self.assertEqual(self.unread_count(), 3)
+        ids = [self.notifications[0].pk, self.notifications[1].pk, self.foreign.pk]
+        response = self.client.post(reverse('notification-mark-read'), {'ids': ids}, format='json')
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(self.unread_count(), 1)
+        self.foreign.refresh_from_db()
+        self.assertFalse(self.foreign.is_read)
+
+    def test_mark_read_requires_ids(self):
+        response = self.client.post(reverse('notification-mark-read'), {'ids': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_mark_all_read(self):
+        self.assertEqual(self.unread_count(), 3)
+        response = self.client.post(reverse('notification-mark-all-read'))
+        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual(self.unread_count(), 0)
+
+    def test_mark_one_read(self):
+        response = self.client.post(reverse('notification-mark-one-read', args=[self.notifications[0].pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.unread_count(), 2)
+        response = self.client.post(reverse('notification-mark-one-read', args=[self.foreign.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+class NotificationStreamTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='testuser@localhost.ru', password='testpass')
+        cls.post = Post.objects.create(title='Test Post', content='Test Content', author=cls.user)
+        cls.notifications = [Notification.objects.create(user=cls.user, message=f'n{i}') for i in range(3)]
+        cls.token = str(RefreshToken.for_user(cls.user).access_token)
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_stream_requires_token(self):
+        response = await self.async_client.get(reverse('notification-stream'))
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(reverse('notification-stream'), {'ticket': 'broken'})
+        self.assertEqual(response.status_code, 401)
+        # Сам токен в строке запроса больше не принимается
+        response = await self.async_client.get(reverse('notification-stream'), {'token': self.token})
+        self.assertEqual(response.status_code, 401)
+
+    def test_stream_is_refused_under_wsgi(self):
+        response = self.client.get(reverse('notification-stream'), headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 501)
+
+    async def test_ticket_is_single_use(self):
+        response = await self.async_client.post(
+            reverse('notification-stream-ticket'), headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 200)
+        ticket = response.json()['ticket']
+        self.assertNotIn(self.token, ticket)
+
+        response = await self.async_client.get(reverse('notification-stream'), {'ticket': ticket})
+        self.assertEqual(response.status_code, 200)
+        events = response.streaming_content
+        self.assertTrue((await anext(events)).startswith(b'retry: '))
+        reading = asyncio.ensure_future(anext(events))
+        await asyncio.sleep(0)
+        reading.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await reading
+
+        response = await self.async_client.get(reverse('notification-stream'), {'ticket': ticket})
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(SSE_HEARTBEAT_SECONDS=0.01)
+    async def test_stream_replays_missed_and_pushes_new(self):
+        response = await self.async_client.get(
+            reverse('notification-stream'), headers={'Authorization': f'Bearer {self.token}',
+                                                     'Last-Event-ID': str(self.notifications[0].pk)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = response.streaming_content
+        try:
+            self.assertTrue((await anext(events)).startswith(b'retry: '))
+            for notification in self.notifications[1:]:
+                self.assertTrue((await anext(events)).startswith(f'id: {notification.pk}\nevent: notification\n'.encode()))
+            self.assertEqual(await anext(events), b': heartbeat\n\n')
+
+            get_broker().publish(self.user.pk, {'id': 999, 'message': 'live'})
+            event = await anext(events)
+            while event == b': heartbeat\n\n':
+                event = await anext(events)
+            self.assertEqual(event, b'id: 999\nevent: notification\ndata: {"id": 999, "message": "live"}\n\n')
+        finally:
+            # Так ASGI-обработчик останавливает поток при отключении клиента
+            reading = asyncio.ensure_future(anext(events))
+            await asyncio.sleep(0)
+            reading.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await reading
+        self.assertNotIn(self.user.pk, get_broker().subscribers)
+
+    def test_celery_worker_requires_redis(self):
+        with override_settings(NOTIFICATIONS_REDIS_URL=None, CELERY_BROKER_URL='redis://localhost:6379/0'), \
+                mock.patch('notifications.pubsub._broker', None):
+            self.assertEqual([error.id for error in check_notifications_broker(None)], ['notifications.E001'])
+            with self.assertRaises(ImproperlyConfigured):
+                get_broker()
+            with override_settings(CELERY_TASK_ALWAYS_EAGER=True):
+                self.assertEqual(check_notifications_broker(None), [])
+                self.assertIsInstance(get_broker(), LocalBroker)
+
+    def test_new_notifications_are_published(self):
+        with mock.patch('notifications.pubsub.LocalBroker.publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                notification = Notification.objects.create(user=self.user, message='new')
+        publish.assert_called_once()
+        self.assertEqual(publish.call_args.args[0], self.user.pk)
+        self.assertEqual(publish.call_args.args[1]['id'], notification.pk)
+
+        other = User.objects.create_user(username='otheruser', email='otheruser@localhost.ru', password='testpass')
+        like = Like.objects.create(user=other, post=self.post)
+        with mock.patch('notifications.pubsub.LocalBroker.publish') as publish:
+            send_like_notification(self.post.pk, like_notification_window(like.created_at.timestamp()))
+        self.assertEqual(publish.call_args.args[1]['actor_count'], 1)
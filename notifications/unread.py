@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Notification
+
+
+def unread_count_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def get_unread_count(user_id):
+    key = unread_count_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        # Покрывается индексом (user, is_read, created_at)
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.set(key, count, settings.UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def invalidate_unread_count(*user_ids):
+    cache.delete_many([unread_count_key(user_id) for user_id in user_ids])
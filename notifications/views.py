@@ -1,19 +1,150 @@
+import json
+import secrets
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from rest_framework.decorators import action  # Добавь эту строку
+from rest_framework.exceptions import APIException
 from rest_framework.response import Response
-from rest_framework import viewsets
+from rest_framework import viewsets, status
 from .models import Notification
-from .serializers import NotificationSerializer
+from .pubsub import get_broker
+from .serializers import NotificationSerializer, NotificationIdsSerializer
+from .unread import get_unread_count, invalidate_unread_count
+from blog.pagination import KeysetPagination
+from users.authentication import CachedJWTAuthentication
 # Create your views here.
 class NotificationViewSet(viewsets.ModelViewSet):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return self.queryset.filter(user=self.request.user).order_by('-created_at')
-    
-    @action(detail=True, methods=['post'])
-    def mark_read(self, request, pk=None):
-        notification = self.get_object()
-        notification.is_read = True
-        notification.save()
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        return Response({'unread_count': get_unread_count(request.user.id)})
+
+    @action(detail=False, methods=['post'])
+    def mark_all_read(self, request):
+        updated = Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        invalidate_unread_count(request.user.id)
+        return Response({'updated': updated})
+
+    @action(detail=False, methods=['post'])
+    def mark_read(self, request):
+        serializer = NotificationIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = Notification.objects.filter(
+            user=request.user, is_read=False, pk__in=serializer.validated_data['ids']
+        ).update(is_read=True)
+        invalidate_unread_count(request.user.id)
+        return Response({'updated': updated})
+
+    @action(detail=True, methods=['post'], url_path='mark_read', url_name='mark-one-read')
+    def mark_one_read(self, request, pk=None):
+        if not Notification.objects.filter(user=request.user, pk=pk).update(is_read=True):
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        invalidate_unread_count(request.user.id)
         return Response({'message': 'Notification marked as read'})
+
+    @action(detail=False, methods=['post'])
+    def stream_ticket(self, request):
+        return Response({'ticket': issue_stream_ticket(str(request.auth)), 'expires_in': settings.SSE_TICKET_SECONDS})
+
+
+def stream_ticket_key(ticket):
+    return f'notifications:stream-ticket:{ticket}'
+
+
+def issue_stream_ticket(raw_token):
+    # Одноразовый билет вместо токена в URL: строка запроса попадает в логи прокси и сервера
+    ticket = secrets.token_urlsafe(32)
+    cache.set(stream_ticket_key(ticket), raw_token, settings.SSE_TICKET_SECONDS)
+    return ticket
+
+
+def redeem_stream_ticket(ticket):
+    key = stream_ticket_key(ticket)
+    raw_token = cache.get(key)
+    # delete вернёт False второму из одновременных запросов с тем же билетом
+    if raw_token is None or not cache.delete(key):
+        return None
+    return raw_token
+
+
+def authenticate_stream(request):
+    # EventSource не умеет слать заголовки, поэтому вместо них принимается билет из ?ticket=
+    auth = CachedJWTAuthentication()
+    header = auth.get_header(request)
+    if header:
+        raw_token = auth.get_raw_token(header)
+    else:
+        raw_token = redeem_stream_ticket(request.GET.get('ticket', ''))
+        raw_token = raw_token.encode() if raw_token else None
+    if raw_token is None:
+        return None
+    try:
+        # Токен проверяется и при погашении билета: бан или смена пароля действуют сразу
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except APIException:
+        return None
+
+
+def parse_last_event_id(request):
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def missed_notifications(user, last_event_id):
+    # Самые свежие из пропущенных, по возрастанию id
+    notifications = Notification.objects.filter(user=user, pk__gt=last_event_id).order_by('-pk')
+    return [dict(data) for data in reversed(NotificationSerializer(notifications[:settings.SSE_REPLAY_LIMIT], many=True).data)]
+
+
+def sse_event(data):
+    return f'id: {data["id"]}\nevent: notification\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+
+async def notification_events(user, last_event_id):
+    """
+    Поток SSE: сначала пропущенные с Last-Event-ID уведомления, потом новые по мере
+    публикации. Подписка оформляется до чтения пропущенных, чтобы ничего не потерять;
+    возможный повтор безопасен - клиент различает уведомления по id.
+    Уведомление, обновлённое после обрыва (новые лайки в то же окно), при переподключении не повторяется.
+    """
+    subscription = await get_broker().subscribe(user.pk)
+    try:
+        yield f'retry: {settings.SSE_RETRY_MS}\n\n'
+        if last_event_id is not None:
+            for data in await sync_to_async(missed_notifications)(user, last_event_id):
+                yield sse_event(data)
+        while True:
+            data = await subscription.get(settings.SSE_HEARTBEAT_SECONDS)
+            # Комментарий-heartbeat не даёт прокси закрыть простаивающее соединение
+            yield ': heartbeat\n\n' if data is None else sse_event(data)
+    finally:
+        await subscription.close()
+
+
+@require_GET
+async def notification_stream(request):
+    # Под WSGI бесконечный ответ навсегда занял бы поток сервера
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': 'The notification stream is only served under ASGI.'}, status=501)
+    user = await sync_to_async(authenticate_stream)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided or are invalid.'}, status=401)
+    response = StreamingHttpResponse(
+        notification_events(user, parse_last_event_id(request)), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
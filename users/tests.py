@@ -1,3 +1,66 @@
+from http import HTTPStatus
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.urls import reverse
+from django.contrib.auth import get_user_model
 
-# Create your tests here.
+User = get_user_model()
+
+
+class CachedJWTAuthenticationTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', email='testuser@localhost.ru', password='testpass')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('notification-unread-count')
+
+    def login(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def test_user_is_served_from_cache(self):
+        self.login()
+        self.assertEqual(self.client.get(self.url).status_code, HTTPStatus.OK)
+        # и пользователь, и счётчик непрочитанных уже в кэше
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).status_code, HTTPStatus.OK)
+
+    def test_ban_takes_effect_immediately(self):
+        self.login()
+        self.assertEqual(self.client.get(self.url).status_code, HTTPStatus.OK)
+        self.user.is_banned = True
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        self.assertEqual(response.data['code'], 'user_banned')
+
+    def test_deactivation_takes_effect_immediately(self):
+        self.login()
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+        self.assertEqual(self.client.get(self.url).status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_password_change_revokes_tokens(self):
+        self.login()
+        self.client.get(self.url)
+        self.user.set_password('newpass')
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        self.assertEqual(response.data['code'], 'password_changed')
+        self.login()
+        self.assertEqual(self.client.get(self.url).status_code, HTTPStatus.OK)
+
+    def test_banned_user_cannot_obtain_token(self):
+        response = self.client.post(reverse('jwt-create'), {'email': 'testuser@localhost.ru', 'password': 'testpass'})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.user.is_banned = True
+        self.user.save()
+        response = self.client.post(reverse('jwt-create'), {'email': 'testuser@localhost.ru', 'password': 'testpass'})
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)